@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 
-from app.routes import docs_split, doc_status, files_proxy, docs_extract
+from app.routes import docs_split, docs_bulk, doc_status, doc_previews, files_proxy, docs_extract, search
 
 app = FastAPI(
     title="VDR Extract API",
@@ -16,6 +16,9 @@ def health(): return {"status": "up"}
 
 
 app.include_router(docs_split.router)
+app.include_router(docs_bulk.router)
 app.include_router(doc_status.router)
+app.include_router(doc_previews.router)
 app.include_router(files_proxy.router)
 app.include_router(docs_extract.router)
+app.include_router(search.router)
@@ -0,0 +1,51 @@
+from typing import Dict, Any, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Header, Response
+
+from app.services.page_preview import PageNotFound, get_page_preview, snap_preview_dpi
+from app.services.rq_conn import get_queue
+from app.services.storage import get_minio_client, get_json_from_minio, BUCKET
+
+router = APIRouter(prefix="/docs", tags=["docs"])
+
+PRERENDER_TASK = "app.worker_tasks.docs_worker_tasks.prerender_chunk_previews_task"
+
+
+@router.get("/{doc_id}/pages/{page_no}/preview")
+def get_page_preview_image(
+        doc_id: str,
+        page_no: int,
+        dpi: int = Query(72, ge=24, le=300),
+        if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+):
+    """
+    Render satu halaman sebagai PNG (PyMuPDF) lewat cache berlapis:
+    LRU in-process -> disk lokal -> storage -> render.
+    dpi dibulatkan ke resolusi yang didukung (72 / 150).
+    """
+    dpi = snap_preview_dpi(dpi)
+    try:
+        etag, png = get_page_preview(doc_id, page_no, dpi)
+    except PageNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400", "X-Preview-DPI": str(dpi)}
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=png, media_type="image/png", headers=headers)
+
+
+@router.post("/{doc_id}/previews/prerender")
+def prerender_doc_previews(doc_id: str, dpi: int = Query(72, ge=24, le=300)) -> Dict[str, Any]:
+    manifest = get_json_from_minio(get_minio_client(), BUCKET, f"docs/{doc_id}/manifest.json")
+    if not manifest:
+        raise HTTPException(status_code=404, detail="manifest not found")
+
+    dpi = snap_preview_dpi(dpi)
+    q = get_queue("docs")
+    jobs = [
+        q.prepare_data(PRERENDER_TASK, args=(doc_id, ch["expected_key"], ch["start_page"], dpi), timeout=10 * 60)
+        for ch in manifest.get("chunks", [])
+    ]
+    enqueued = q.enqueue_many(jobs) if jobs else []
+    return {"status": "queued", "doc_id": doc_id, "dpi": dpi, "job_ids": [j.id for j in enqueued]}
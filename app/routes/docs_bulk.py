@@ -0,0 +1,107 @@
+import posixpath
+import tarfile
+import zipfile
+from typing import List, Dict, Any, Iterator, Tuple, IO
+from uuid import uuid4
+
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from pydantic import BaseModel, Field
+
+from app.routes.files_proxy import _sanitize_key
+from app.services.docs_bulk_pipeline import new_batch_id, create_batch, get_batch_status
+from app.services.storage import put_stream
+
+router = APIRouter(prefix="/docs/bulk", tags=["Docs"])
+MAX_BYTES = 50 * 1024 * 1024  # per dokumen, sama dengan upload tunggal
+MAX_KEYS = 10_000
+
+
+class BulkKeysRequest(BaseModel):
+    keys: List[str] = Field(..., min_length=1, max_length=MAX_KEYS)
+    pages_per_chunk: int = Field(default=25, ge=1, le=200)
+
+
+def _iter_archive_pdfs(fobj) -> Iterator[Tuple[str, int, IO[bytes]]]:
+    """
+    Yield (nama member, ukuran, file-like) untuk setiap PDF di ZIP/tar tanpa ekstrak ke disk.
+    """
+    if zipfile.is_zipfile(fobj):
+        fobj.seek(0)
+        with zipfile.ZipFile(fobj) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                with zf.open(info) as member:
+                    yield info.filename, info.file_size, member
+        return
+
+    fobj.seek(0)
+    try:
+        tf = tarfile.open(fileobj=fobj, mode="r|*")  # streaming, tidak perlu seek
+    except tarfile.TarError:
+        raise HTTPException(400, "Only ZIP or tar archives")
+    with tf:
+        for member in tf:
+            if not member.isfile():
+                continue
+            f = tf.extractfile(member)
+            if f is not None:
+                yield member.name, member.size, f
+
+
+@router.post("/upload-split/async")
+def bulk_upload_and_split_async(
+        file: UploadFile = File(..., description="ZIP / tar(.gz) berisi PDF"),
+        pages_per_chunk: int = Form(default=25, ge=1, le=200),
+):
+    batch_id = new_batch_id()
+    docs: List[Dict[str, Any]] = []
+    skipped: List[Dict[str, Any]] = []
+
+    for name, size, member in _iter_archive_pdfs(file.file):
+        if not name.lower().endswith(".pdf"):
+            skipped.append({"filename": name, "reason": "not a pdf"})
+            continue
+        if size > MAX_BYTES:
+            skipped.append({"filename": name, "reason": "exceeds 50MB"})
+            continue
+        doc_id = uuid4().hex
+        original_key = f"docs/{doc_id}/original.pdf"
+        put_stream(original_key, member, length=size, content_type="application/pdf")
+        docs.append({"doc_id": doc_id, "original_key": original_key, "filename": posixpath.basename(name)})
+
+    if not docs:
+        raise HTTPException(400, "No PDF found in archive")
+
+    batch = create_batch(batch_id, docs, pages_per_chunk, skipped=skipped)
+    return {
+        "status": "queued", "batch_id": batch_id, "total_docs": len(docs),
+        "skipped": skipped, "planning_jobs": batch["planning_job_ids"],
+        "status_url": f"/docs/bulk/{batch_id}/status",
+    }
+
+
+@router.post("/keys-split/async")
+def bulk_split_existing_keys_async(body: BulkKeysRequest):
+    """
+    Dokumen yang sudah ada di storage: tidak di-copy, manifest langsung menunjuk key aslinya.
+    """
+    batch_id = new_batch_id()
+    docs = [
+        {"doc_id": uuid4().hex, "original_key": _sanitize_key(key), "filename": posixpath.basename(key)}
+        for key in dict.fromkeys(body.keys)
+    ]
+    batch = create_batch(batch_id, docs, body.pages_per_chunk)
+    return {
+        "status": "queued", "batch_id": batch_id, "total_docs": len(docs),
+        "planning_jobs": batch["planning_job_ids"],
+        "status_url": f"/docs/bulk/{batch_id}/status",
+    }
+
+
+@router.get("/{batch_id}/status")
+def bulk_status(batch_id: str) -> Dict[str, Any]:
+    status = get_batch_status(batch_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="batch not found")
+    return status
@@ -1,18 +1,83 @@
-from fastapi import APIRouter
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
+from app.services.boilerplate import boilerplate_key, enqueue_document_dedupe, reconstruct_page_record
 from app.services.docs_extraction_pipeline import plan_pdfplumber_extraction_jobs
+from app.services.storage import BUCKET, get_minio_client, get_json_from_minio, get_jsonl_lines
 
 router = APIRouter(prefix="/docs/extract", tags=["docs-extract"])
 
 
 class PlanResponse(BaseModel):
     doc_id: str
+    run_id: str
     total_jobs: int
     jobs: list
 
 
+class ReExtractRequest(BaseModel):
+    table_settings: Dict[str, Any] | None = None
+
+
 @router.post("/{doc_id}/async", response_model=PlanResponse)
 def extract_pdfplumber_async(doc_id: str):
     plan = plan_pdfplumber_extraction_jobs(doc_id)
     return plan
+
+
+@router.post("/{doc_id}/re-extract", response_model=PlanResponse)
+def reextract_pdfplumber_async(doc_id: str, body: ReExtractRequest):
+    """
+    Jalankan ulang hanya stage yang input-nya berubah (mis. table_settings atau versi stage);
+    text/words diambil dari artifact dan combined_markdown dirakit ulang.
+    """
+    try:
+        plan = plan_pdfplumber_extraction_jobs(doc_id, table_settings=body.table_settings, include_ocr=False)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return plan
+
+
+@router.post("/{doc_id}/dedupe")
+def dedupe_boilerplate_async(doc_id: str) -> Dict[str, Any]:
+    """
+    Jalankan ulang pass boilerplate secara manual (otomatis setelah semua chunk selesai).
+    """
+    job = enqueue_document_dedupe(doc_id)
+    return {"status": "queued", "doc_id": doc_id, "job_id": job.id}
+
+
+@router.get("/{doc_id}/pages/{page_no}")
+def get_page_record(
+        doc_id: str,
+        page_no: int,
+        original: bool = Query(False, description="Sisipkan kembali boilerplate (teks asli)"),
+) -> Dict[str, Any]:
+    client = get_minio_client()
+    manifest = get_json_from_minio(client, BUCKET, f"docs/{doc_id}/manifest.json")
+    if not manifest:
+        raise HTTPException(status_code=404, detail="manifest not found")
+
+    ch = next((c for c in manifest.get("chunks", []) if c["start_page"] <= page_no <= c["end_page"]), None)
+    if ch is None:
+        raise HTTPException(status_code=404, detail="page out of range")
+
+    # texts-dedup/ kalau pass boilerplate sudah jalan, selain itu texts/ asli
+    record = None
+    bases = [f"docs/{doc_id}/{d}/chunk-{ch['index']:04d}" for d in ("texts-dedup", "texts")]
+    for key in (f"{base}{ext}" for base in bases for ext in (".jsonl", ".ocr.jsonl")):
+        try:
+            record = next((r for r in get_jsonl_lines(key) if r["page_no"] == page_no), None)
+        except Exception:
+            continue
+        if record:
+            break
+    if record is None:
+        raise HTTPException(status_code=404, detail="page record not found")
+
+    if original:
+        boilerplate = get_json_from_minio(client, BUCKET, boilerplate_key(doc_id)) or {}
+        record = reconstruct_page_record(record, boilerplate)
+    return record
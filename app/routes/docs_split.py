@@ -1,19 +1,17 @@
-import json
 from uuid import uuid4
 
-import fitz
 from fastapi import APIRouter, UploadFile, File, Form, Request, HTTPException
-from rq import Retry
 
-from app.services.rq_conn import get_queue
-from app.services.storage import put_stream, put_bytes
-from app.worker_tasks.docs_worker_tasks import split_pdf_chunk
+from app.services.docs_split_pipeline import new_split_manifest, enqueue_split_jobs, save_manifest, manifest_key
+from app.services.storage import put_stream
 
 router = APIRouter(prefix="/docs", tags=["Docs"])
 MAX_BYTES = 50 * 1024 * 1024
 
 
 def _count_pages_from_stream(fobj) -> int:
+    import fitz  # lazy: API tidak perlu load PyMuPDF kalau route ini tidak dipanggil
+
     pos = fobj.tell()
     data = fobj.read()
     fobj.seek(pos)
@@ -46,45 +44,13 @@ async def upload_and_split_async(
     original_key = f"docs/{doc_id}/original.pdf"
     put_stream(original_key, file.file, length=size, content_type="application/pdf")
 
-    ranges = []
-    i = 1
-    while i <= total_pages:
-        start = i
-        end = min(i + pages_per_chunk - 1, total_pages)
-        ranges.append((start, end))
-        i = end + 1
-
-    manifest = {
-        "doc_id": doc_id,
-        "original": {"key": original_key, "size_bytes": size, "total_pages": total_pages},
-        "pages_per_chunk": pages_per_chunk,
-        "chunks": [],
-        "status": "processing",
-        "version": "1.0.0",
-    }
-
-    q = get_queue("docs")
-    for idx, (start, end) in enumerate(ranges, start=1):
-        chunk_key = f"docs/{doc_id}/chunks/chunk-{idx:04d}.pdf"
-        meta_key = f"docs/{doc_id}/chunks/chunk-{idx:04d}.json"
-        job = q.enqueue(
-            split_pdf_chunk,
-            original_key, doc_id, idx, start, end, chunk_key, meta_key,
-            job_timeout=20 * 60, retry=Retry(max=3, interval=[10, 30, 60]),
-        )
-        manifest["chunks"].append({
-            "index": idx, "start_page": start, "end_page": end,
-            "expected_key": chunk_key, "meta_key": meta_key,
-            "job_id": job.id, "status": "queued",
-        })
-
-    put_bytes(f"docs/{doc_id}/manifest.json",
-              json.dumps(manifest, ensure_ascii=False, indent=2).encode(),
-              content_type="application/json")
+    manifest = new_split_manifest(doc_id, original_key, size, total_pages, pages_per_chunk)
+    enqueue_split_jobs([manifest])
+    save_manifest(manifest)
 
     return {
         "status": "queued", "doc_id": doc_id, "total_pages": total_pages,
         "pages_per_chunk": pages_per_chunk,
         "chunks": manifest["chunks"],
-        "manifest": "docs/{}/manifest.json".format(doc_id),
+        "manifest": manifest_key(doc_id),
     }
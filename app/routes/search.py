@@ -0,0 +1,35 @@
+import time
+from typing import Dict, Any
+
+from fastapi import APIRouter, Query
+
+from app.services.rq_conn import get_queue
+from app.services.search_index import search_pages
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("")
+def search(
+        q: str = Query(..., min_length=1, description="Full-text query"),
+        limit: int = Query(20, ge=1, le=100),
+        doc_id: str | None = Query(None, description="Batasi ke satu dokumen"),
+) -> Dict[str, Any]:
+    t0 = time.time()
+    hits = search_pages(q, limit=limit, doc_id=doc_id)
+    return {
+        "q": q,
+        "total": len(hits),
+        "took_ms": round(1000 * (time.time() - t0), 2),
+        "hits": hits,
+    }
+
+
+@router.post("/rebuild")
+def rebuild_index() -> Dict[str, Any]:
+    job = get_queue("index").enqueue(
+        "app.services.search_index.rebuild_search_index",
+        job_timeout=2 * 60 * 60,
+        description="rebuild search index",
+    )
+    return {"status": "queued", "job_id": job.id}
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import math
+import posixpath
+import re
+from collections import Counter
+from datetime import datetime
+from typing import List, Dict, Any
+
+from app.services.page_markdown import build_combined_markdown
+from app.services.rq_conn import get_queue
+from app.services.search_index import queue_chunk_for_index
+from app.services.storage import get_jsonl_lines, list_keys, put_bytes, put_jsonl_lines
+
+# baris dianggap boilerplate kalau muncul di >= max(MIN_PAGES, MIN_RATIO * halaman ber-teks)
+BOILERPLATE_MIN_PAGES = 3
+BOILERPLATE_MIN_RATIO = 0.3
+# baris pendek ("Answer:", "N/A") terlalu generik untuk dianggap boilerplate,
+# kecuali nomor halaman / tanggal
+MIN_LINE_CHARS = 12
+
+TEXTS_CHUNK_RE = re.compile(r"/texts/chunk-\d+(\.ocr)?\.jsonl$")
+_DIGITS_RE = re.compile(r"\d+")
+_WS_RE = re.compile(r"\s+")
+# seluruh baris harus berupa penanda halaman/tanggal; angka di baris isi tidak pernah di-fold.
+# "Page 3", "Page 3 of 10", "Halaman 3 dari 10", "3 / 10", "- 3 -" (angka polos "15" / "2023" bukan penanda)
+_PAGE_NO_RE = re.compile(
+    r"(page|halaman|hal\.?)\s*\d+(\s*(of|dari|/)\s*\d+)?"
+    r"|\d+\s*(of|dari|/)\s*\d+"
+    r"|[-–—]\s*\d+\s*[-–—]"
+)
+_MONTH = r"(jan|feb|mar|apr|may|mei|jun|jul|aug|agu|sep|oct|okt|nov|dec|des)[a-z]*\.?"
+_DATE = (
+    r"(\d{4}[-/.]\d{1,2}[-/.]\d{1,2}|\d{1,2}[-/.]\d{1,2}[-/.]\d{4}"
+    rf"|\d{{1,2}}\s+{_MONTH}\s+\d{{4}}|{_MONTH}\s+\d{{1,2}},?\s+\d{{4}})"
+)
+# "2024-01-31", "Date: 31/01/2024", "Printed on 31 Jan 2024 10:15", "Tanggal: January 31, 2024"
+_DATE_LINE_RE = re.compile(rf"([a-z]+\.?\s+){{0,2}}([a-z]+\s*:\s*)?{_DATE}(\s+\d{{1,2}}[:.]\d{{2}}(:\d{{2}})?)?")
+
+
+def _normalize_line(line: str) -> tuple[str, bool]:
+    """
+    Return (baris ter-normalisasi, baris nomor halaman/tanggal?).
+    Angka hanya diganti "#" kalau seluruh baris adalah nomor halaman/tanggal (boleh dengan label pendek),
+    supaya "Page 3 of 10" dan "Page 4 of 10" sama, sementara baris isi seperti "Section 3"
+    atau "Invoice INV-1005 issued 2024-01-05" tetap berbeda per halaman.
+    """
+    s = _WS_RE.sub(" ", line.lower()).strip()
+    if _PAGE_NO_RE.fullmatch(s) or _DATE_LINE_RE.fullmatch(s):
+        return _DIGITS_RE.sub("#", s), True
+    return s, False
+
+
+def _line_hash(norm: str) -> str:
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _iter_block_lines(record: Dict[str, Any]):
+    """
+    Yield (block_idx, line_idx, raw_line, hash|None) untuk text_blocks (tabel tidak disentuh).
+    hash None -> baris kosong atau terlalu pendek untuk jadi kandidat boilerplate.
+    """
+    for b_idx, block in enumerate(record.get("text_blocks") or []):
+        for l_idx, line in enumerate((block.get("content") or "").split("\n")):
+            norm, page_marker = _normalize_line(line)
+            candidate = norm and (page_marker or len(norm) >= MIN_LINE_CHARS)
+            yield b_idx, l_idx, line, (_line_hash(norm) if candidate else None)
+
+
+def detect_boilerplate(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Satu pass linear: hitung di berapa halaman tiap hash baris ter-normalisasi muncul.
+    Return daftar boilerplate [{"id", "hash", "text", "pages"}], urut dari yang paling sering.
+    """
+    page_freq: Counter = Counter()
+    first_text: Dict[str, str] = {}
+    pages_with_text = 0
+
+    for r in records:
+        seen = set()
+        for _, _, line, h in _iter_block_lines(r):
+            if h is None:
+                continue
+            seen.add(h)
+            first_text.setdefault(h, line)
+        if seen:
+            pages_with_text += 1
+            page_freq.update(seen)
+
+    threshold = max(BOILERPLATE_MIN_PAGES, math.ceil(BOILERPLATE_MIN_RATIO * pages_with_text))
+    found = sorted(((h, c) for h, c in page_freq.items() if c >= threshold), key=lambda x: (-x[1], x[0]))
+    return [{"id": i, "hash": h, "text": first_text[h], "pages": c} for i, (h, c) in enumerate(found)]
+
+
+def strip_boilerplate(record: Dict[str, Any], ids_by_hash: Dict[str, int], text_by_id: Dict[int, str]) -> Dict[str, Any]:
+    """
+    Buang baris boilerplate dari text_blocks, simpan referensinya di "boilerplate_refs"
+    (block, line, id, dan "text" kalau baris aslinya beda dari teks kanonik, mis. nomor halaman).
+    """
+    refs = []
+    kept: Dict[int, List[str]] = {}
+    for b_idx, l_idx, line, h in _iter_block_lines(record):
+        if h is not None and h in ids_by_hash:
+            ref = {"block": b_idx, "line": l_idx, "id": ids_by_hash[h]}
+            if line != text_by_id[ref["id"]]:
+                ref["text"] = line
+            refs.append(ref)
+        else:
+            kept.setdefault(b_idx, []).append(line)
+
+    if not refs:
+        return record
+
+    blocks = []
+    for b_idx, block in enumerate(record.get("text_blocks") or []):
+        if b_idx in kept:
+            blocks.append({**block, "content": "\n".join(kept[b_idx])})
+        else:
+            # semua baris blok ini boilerplate; tandai supaya rekonstruksi tidak menambah baris kosong
+            blocks.append({**block, "content": "", "boilerplate_only": True})
+    return {
+        **record,
+        "text_blocks": blocks,
+        "combined_markdown": build_combined_markdown(blocks, record.get("tables") or []),
+        "boilerplate_refs": refs,
+    }
+
+
+def reconstruct_page_record(record: Dict[str, Any], boilerplate: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Kebalikan strip_boilerplate: sisipkan kembali baris boilerplate ke posisi aslinya.
+    """
+    refs = record.get("boilerplate_refs")
+    if not refs:
+        return record
+
+    text_by_id = {bp["id"]: bp["text"] for bp in boilerplate.get("lines", [])}
+    lines_by_block = {
+        b_idx: [] if block.get("boilerplate_only") else (block.get("content") or "").split("\n")
+        for b_idx, block in enumerate(record.get("text_blocks") or [])
+    }
+    # sisipkan urut posisi asli supaya indeks baris tetap benar
+    for ref in sorted(refs, key=lambda r: (r["block"], r["line"])):
+        lines_by_block[ref["block"]].insert(ref["line"], ref.get("text", text_by_id[ref["id"]]))
+
+    blocks = [
+        {**{k: v for k, v in block.items() if k != "boilerplate_only"}, "content": "\n".join(lines_by_block[b_idx])}
+        for b_idx, block in enumerate(record.get("text_blocks") or [])
+    ]
+    out = {k: v for k, v in record.items() if k != "boilerplate_refs"}
+    out["text_blocks"] = blocks
+    out["combined_markdown"] = build_combined_markdown(blocks, record.get("tables") or [])
+    return out
+
+
+def boilerplate_key(doc_id: str) -> str:
+    return f"docs/{doc_id}/boilerplate.json"
+
+
+def dedup_jsonl_key(jsonl_key: str) -> str:
+    # docs/{doc_id}/texts/chunk-0001.jsonl -> docs/{doc_id}/texts-dedup/chunk-0001.jsonl
+    doc_dir = posixpath.dirname(posixpath.dirname(jsonl_key))
+    return f"{doc_dir}/texts-dedup/{posixpath.basename(jsonl_key)}"
+
+
+def enqueue_document_dedupe(doc_id: str):
+    """
+    Enqueue pass boilerplate di antrian "docs" (otomatis setelah run selesai, atau manual).
+    """
+    return get_queue("docs").enqueue(
+        "app.services.boilerplate.dedupe_document_boilerplate",
+        doc_id,
+        job_timeout=20 * 60,
+    )
+
+
+def dedupe_document_boilerplate(doc_id: str) -> dict:
+    """
+    Pass level dokumen setelah ekstraksi selesai: deteksi header/footer/banner yang
+    berulang, simpan sekali di boilerplate.json, dan tulis record per halaman tanpa
+    boilerplate ke texts-dedup/. File texts/ asli tidak diubah; search index
+    di-update dari texts-dedup/.
+    """
+    keys = sorted(k for k in list_keys(f"docs/{doc_id}/texts/") if TEXTS_CHUNK_RE.search(k))
+    chunks = {k: get_jsonl_lines(k) for k in keys}
+    all_records = [r for recs in chunks.values() for r in recs]
+
+    lines = detect_boilerplate(all_records)
+    ids_by_hash = {bp["hash"]: bp["id"] for bp in lines}
+    text_by_id = {bp["id"]: bp["text"] for bp in lines}
+
+    bytes_before = 0
+    bytes_after = 0
+    for key, recs in chunks.items():
+        out = [strip_boilerplate(r, ids_by_hash, text_by_id) for r in recs]
+        bytes_before += sum(len(r.get("combined_markdown") or "") for r in recs)
+        bytes_after += sum(len(r.get("combined_markdown") or "") for r in out)
+        put_jsonl_lines(dedup_jsonl_key(key), out)
+        queue_chunk_for_index(dedup_jsonl_key(key))
+
+    summary = {
+        "doc_id": doc_id,
+        "pages_scanned": len(all_records),
+        "chunks_written": len(chunks),
+        "markdown_chars_before": bytes_before,
+        "markdown_chars_after": bytes_after,
+        "lines": lines,
+        "updated_at": datetime.utcnow().isoformat() + "Z",
+    }
+    put_bytes(boilerplate_key(doc_id), json.dumps(summary, ensure_ascii=False, indent=2).encode(),
+              content_type="application/json")
+    return {k: v for k, v in summary.items() if k != "lines"} | {"boilerplate_lines": len(lines)}
@@ -0,0 +1,136 @@
+import json
+from datetime import datetime
+from typing import List, Dict, Any
+from uuid import uuid4
+
+from app.services.rq_conn import get_queue, get_redis_connection
+from app.services.storage import BUCKET, get_minio_client, get_json_from_minio, put_bytes
+
+PLAN_TASK = "app.worker_tasks.docs_worker_tasks.plan_bulk_split_task"
+PLAN_GROUP_SIZE = 50  # dokumen per job planning
+BATCH_COUNTER_TTL_S = 30 * 24 * 3600
+
+
+def batch_key(batch_id: str) -> str:
+    return f"batches/{batch_id}.json"
+
+
+def new_batch_id() -> str:
+    return uuid4().hex
+
+
+def create_batch(batch_id: str, docs: List[Dict[str, Any]], pages_per_chunk: int, skipped: List[Dict] | None = None) -> Dict[str, Any]:
+    """
+    Simpan record batch lalu enqueue planning per kelompok dokumen dalam satu pipeline.
+    docs: [{"doc_id": "...", "original_key": "...", "filename": "..."}]
+    """
+    q = get_queue("docs")
+    job_datas = [
+        q.prepare_data(PLAN_TASK, args=(batch_id, docs[i:i + PLAN_GROUP_SIZE], pages_per_chunk), timeout=60 * 60)
+        for i in range(0, len(docs), PLAN_GROUP_SIZE)
+    ]
+    jobs = q.enqueue_many(job_datas) if job_datas else []
+
+    batch = {
+        "batch_id": batch_id,
+        "pages_per_chunk": pages_per_chunk,
+        "docs": docs,
+        "skipped": skipped or [],
+        "planning_job_ids": [j.id for j in jobs],
+        "created_at": datetime.utcnow().isoformat() + "Z",
+    }
+    put_bytes(batch_key(batch_id), json.dumps(batch, ensure_ascii=False).encode(), content_type="application/json")
+    return batch
+
+
+def _counter_key(batch_id: str, name: str) -> str:
+    return f"batch:{batch_id}:{name}"
+
+
+def record_batch_planned(batch_id: str, manifests: List[Dict[str, Any]], failed_doc_ids: List[str]):
+    """
+    Dipanggil planning: jumlah chunk per dokumen + dokumen yang gagal dibaca.
+    """
+    pipe = get_redis_connection().pipeline(transaction=False)
+    totals = {m["doc_id"]: len(m["chunks"]) for m in manifests}
+    if totals:
+        pipe.hset(_counter_key(batch_id, "chunks-total"), mapping=totals)
+    if failed_doc_ids:
+        pipe.sadd(_counter_key(batch_id, "failed-docs"), *failed_doc_ids)
+    for name in ("chunks-total", "failed-docs"):
+        pipe.expire(_counter_key(batch_id, name), BATCH_COUNTER_TTL_S)
+    pipe.execute()
+
+
+def record_batch_chunk(batch_id: str, doc_id: str, chunk_index: int, ok: bool):
+    """
+    Dipanggil worker split setelah meta chunk ditulis (sekali per chunk, aman untuk retry).
+    """
+    conn = get_redis_connection()
+    seen_key = _counter_key(batch_id, "chunks-seen")
+    if not conn.sadd(seen_key, f"{doc_id}:{chunk_index}"):
+        return
+    counter_key = _counter_key(batch_id, "chunks-done" if ok else "chunks-failed")
+    pipe = conn.pipeline(transaction=False)
+    pipe.hincrby(counter_key, doc_id, 1)
+    pipe.expire(counter_key, BATCH_COUNTER_TTL_S)
+    pipe.expire(seen_key, BATCH_COUNTER_TTL_S)
+    pipe.execute()
+
+
+def get_batch_status(batch_id: str) -> Dict[str, Any] | None:
+    """
+    Progress batch dari counter Redis (diisi planning + worker split): satu GET record batch
+    dan satu round-trip Redis, tidak tergantung jumlah dokumen / chunk.
+    """
+    batch = get_json_from_minio(get_minio_client(), BUCKET, batch_key(batch_id))
+    if not batch:
+        return None
+
+    pipe = get_redis_connection().pipeline(transaction=False)
+    pipe.hgetall(_counter_key(batch_id, "chunks-total"))
+    pipe.hgetall(_counter_key(batch_id, "chunks-done"))
+    pipe.hgetall(_counter_key(batch_id, "chunks-failed"))
+    pipe.smembers(_counter_key(batch_id, "failed-docs"))
+    totals_raw, done_raw, failed_raw, failed_docs_raw = pipe.execute()
+    totals, done, failed = (
+        {k.decode(): int(v) for k, v in h.items()} for h in (totals_raw, done_raw, failed_raw)
+    )
+    failed_docs = {m.decode() for m in failed_docs_raw}
+
+    doc_ids = [d["doc_id"] for d in batch["docs"]]
+    counts = {"pending": 0, "finished": 0, "failed": 0}
+    docs_out = []
+    for doc_id in doc_ids:
+        if doc_id in failed_docs:
+            docs_out.append({"doc_id": doc_id, "status": "error", "total_chunks": 0, "finished_chunks": 0})
+            continue
+        if doc_id not in totals:
+            docs_out.append({"doc_id": doc_id, "status": "planning", "total_chunks": 0, "finished_chunks": 0})
+            continue
+        total, finished, errors = totals[doc_id], done.get(doc_id, 0), failed.get(doc_id, 0)
+        counts["finished"] += finished
+        counts["failed"] += errors
+        counts["pending"] += max(total - finished - errors, 0)
+        if finished + errors < total:
+            status = "processing"
+        elif errors:
+            status = "error"
+        else:
+            status = "split_done"
+        docs_out.append({"doc_id": doc_id, "status": status,
+                         "total_chunks": total, "finished_chunks": finished})
+
+    total_chunks = sum(d["total_chunks"] for d in docs_out)
+    docs_done = sum(1 for d in docs_out if d["status"] in ("split_done", "error"))
+    return {
+        "batch_id": batch_id,
+        "total_docs": len(doc_ids),
+        "docs_planned": sum(1 for d in docs_out if d["status"] != "planning"),
+        "docs_done": docs_done,
+        "total_chunks": total_chunks,
+        "progress_pct": round(100.0 * docs_done / max(len(doc_ids), 1), 2),
+        "counts": counts,
+        "skipped": batch.get("skipped", []),
+        "docs": docs_out,
+    }
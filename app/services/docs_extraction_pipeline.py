@@ -1,10 +1,16 @@
+import json
 from typing import List, Dict
+from uuid import uuid4
 
 from rq import Retry
 
+from app.services.page_classifier import PAGE_CLASS_TEXT, PAGE_CLASS_IMAGE_ONLY
 from app.services.rq_conn import get_queue  # asumsi sudah ada
-from app.services.storage import BUCKET, get_minio_client, get_json_from_minio
-from app.worker_tasks.extraction_worker_tasks import extract_chunk_pdfplumber_task
+from app.services.straggler_monitor import EXTRACT_TASK, init_run, schedule_extraction_monitor
+from app.services.storage import BUCKET, get_minio_client, get_json_from_minio, put_bytes
+
+# task di-enqueue lewat dotted path supaya API tidak meng-import pdfplumber / PyMuPDF
+OCR_TASK = "app.worker_tasks.ocr_worker_tasks.extract_chunk_ocr_task"
 
 
 def _load_manifest(doc_id: str) -> dict | None:
@@ -13,13 +19,45 @@ def _load_manifest(doc_id: str) -> dict | None:
     return get_json_from_minio(client, BUCKET, key)
 
 
-def plan_pdfplumber_extraction_jobs(doc_id: str) -> Dict[str, any]:
+def _save_manifest(doc_id: str, manifest: dict):
+    put_bytes(f"docs/{doc_id}/manifest.json",
+              json.dumps(manifest, ensure_ascii=False, indent=2).encode(),
+              content_type="application/json")
+
+
+def _chunk_page_classes(ch: Dict) -> List[str] | None:
+    """
+    Ambil klasifikasi per halaman dari manifest; kalau belum ada, baca dari meta split chunk.
+    None -> chunk lama tanpa klasifikasi (semua halaman diproses penuh).
+    """
+    if ch.get("page_classes"):
+        return ch["page_classes"]
+    meta = get_json_from_minio(get_minio_client(), BUCKET, ch["meta_key"]) if ch.get("meta_key") else None
+    if not meta or not meta.get("pages"):
+        return None
+    return [p["class"] for p in meta["pages"]]
+
+
+def plan_pdfplumber_extraction_jobs(
+        doc_id: str,
+        table_settings: Dict[str, any] | None = None,
+        include_ocr: bool = True,
+) -> Dict[str, any]:
     """
     Baca manifest → buat job untuk setiap chunk.
+    Halaman "image_only" dikirim ke antrian "ocr" (bisa di-scale terpisah).
+    Dipakai juga untuk re-extract: stage yang fingerprint-nya tidak berubah
+    diambil dari artifact, jadi hanya stage yang terdampak yang dijalankan ulang.
+    table_settings disimpan di manifest; plan berikutnya tanpa table_settings memakai
+    setting tersimpan itu (bukan default), jadi tabel hasil tuning tidak tertimpa.
+    Setiap plan punya run_id; monitor straggler memakai run_id ini untuk memantau
+    runtime chunk dan menjalankan duplikat spekulatif untuk chunk yang lambat.
     Hasil JSON:
     {
       "doc_id": "...",
-      "jobs": [{"chunk_index": 1, "job_id": "...", "out_jsonl_key": "..."}]
+      "run_id": "...",
+      "jobs": [{"chunk_index": 1, "job_id": "...", "out_jsonl_key": "...",
+                "ocr_job_id": "..." | None, "ocr_jsonl_key": "..." | None}]
     }
     """
     manifest = _load_manifest(doc_id)
@@ -28,9 +66,33 @@ def plan_pdfplumber_extraction_jobs(doc_id: str) -> Dict[str, any]:
 
     chunks: List[Dict] = manifest.get("chunks", [])
     q = get_queue("extractions")
+    ocr_q = get_queue("ocr")
     jobs = []
+    monitored = []
+    manifest_changed = False
 
+    if table_settings is None:
+        table_settings = manifest.get("table_settings")
+    elif manifest.get("table_settings") != table_settings:
+        manifest["table_settings"] = table_settings
+        manifest_changed = True
+
+    run_id = uuid4().hex
+
+    # klasifikasi dulu semua chunk supaya total job (teks + OCR) diketahui sebelum enqueue
+    planned = []
     for ch in chunks:
+        page_classes = _chunk_page_classes(ch)
+        if page_classes and ch.get("page_classes") != page_classes:
+            ch["page_classes"] = page_classes
+            manifest_changed = True
+        ocr_pages = [
+            ch["start_page"] + i for i, cls in enumerate(page_classes or []) if cls == PAGE_CLASS_IMAGE_ONLY
+        ] if include_ocr else []
+        planned.append((ch, page_classes, ocr_pages))
+    init_run(doc_id, run_id, len(planned) + sum(1 for _, _, ocr_pages in planned if ocr_pages))
+
+    for ch, page_classes, ocr_pages in planned:
         idx = ch["index"]
         start_page = ch["start_page"]  # dari manifest split
         expected_pdf_key = ch["expected_key"]  # lokasi chunk pdf
@@ -42,13 +104,49 @@ def plan_pdfplumber_extraction_jobs(doc_id: str) -> Dict[str, any]:
             "chunk_pdf_key": expected_pdf_key,
             "out_jsonl_key": out_jsonl_key,
             "page_offset": start_page,
+            "page_classes": page_classes,
+            "page_count": ch["end_page"] - ch["start_page"] + 1,
+            "table_settings": table_settings,
+            "run_id": run_id,
         }
 
         job = q.enqueue(
-            extract_chunk_pdfplumber_task,
+            EXTRACT_TASK,
             payload,
             job_timeout=20 * 60,
             retry=Retry(max=3, interval=[10, 30, 60]))
-        jobs.append({"chunk_index": idx, "job_id": job.id, "out_jsonl_key": out_jsonl_key})
+        text_pages = (page_classes.count(PAGE_CLASS_TEXT) if page_classes
+                      else ch["end_page"] - ch["start_page"] + 1)
+        monitored.append({"chunk_index": idx, "job_id": job.id, "pages": max(text_pages, 1), "payload": payload})
+
+        ocr_job_id = None
+        ocr_jsonl_key = None
+        if ocr_pages:
+            ocr_jsonl_key = f"docs/{doc_id}/texts/chunk-{idx:04d}.ocr.jsonl"
+            ocr_job = ocr_q.enqueue(
+                OCR_TASK,
+                {
+                    "doc_id": doc_id,
+                    "chunk_index": idx,
+                    "chunk_pdf_key": expected_pdf_key,
+                    "out_jsonl_key": ocr_jsonl_key,
+                    "page_offset": start_page,
+                    "page_nos": ocr_pages,
+                    "run_id": run_id,
+                },
+                job_timeout=20 * 60,
+                retry=Retry(max=3, interval=[10, 30, 60]))
+            ocr_job_id = ocr_job.id
+
+        jobs.append({
+            "chunk_index": idx, "job_id": job.id, "out_jsonl_key": out_jsonl_key,
+            "ocr_job_id": ocr_job_id, "ocr_jsonl_key": ocr_jsonl_key,
+        })
+
+    if manifest_changed:
+        _save_manifest(doc_id, manifest)
+
+    if monitored:
+        schedule_extraction_monitor(doc_id, run_id, monitored)
 
-    return {"doc_id": doc_id, "jobs": jobs, "total_jobs": len(jobs)}
+    return {"doc_id": doc_id, "run_id": run_id, "jobs": jobs, "total_jobs": len(jobs)}
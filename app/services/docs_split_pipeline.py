@@ -0,0 +1,88 @@
+import json
+from typing import List, Dict, Any, Tuple
+from uuid import uuid4
+
+from rq import Retry
+
+from app.services.rq_conn import get_queue
+from app.services.storage import put_bytes
+
+SPLIT_TASK = "app.worker_tasks.docs_worker_tasks.split_pdf_chunk"
+
+
+def manifest_key(doc_id: str) -> str:
+    return f"docs/{doc_id}/manifest.json"
+
+
+def plan_chunk_ranges(total_pages: int, pages_per_chunk: int) -> List[Tuple[int, int]]:
+    ranges = []
+    i = 1
+    while i <= total_pages:
+        start = i
+        end = min(i + pages_per_chunk - 1, total_pages)
+        ranges.append((start, end))
+        i = end + 1
+    return ranges
+
+
+def new_split_manifest(
+        doc_id: str,
+        original_key: str,
+        size: int | None,
+        total_pages: int,
+        pages_per_chunk: int,
+        batch_id: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Manifest dokumen baru; job_id tiap chunk diisi oleh enqueue_split_jobs.
+    """
+    manifest = {
+        "doc_id": doc_id,
+        "original": {"key": original_key, "size_bytes": size, "total_pages": total_pages},
+        "pages_per_chunk": pages_per_chunk,
+        "chunks": [],
+        "status": "processing",
+        "version": "1.0.0",
+    }
+    if batch_id:
+        manifest["batch_id"] = batch_id
+
+    for idx, (start, end) in enumerate(plan_chunk_ranges(total_pages, pages_per_chunk), start=1):
+        manifest["chunks"].append({
+            "index": idx, "start_page": start, "end_page": end,
+            "expected_key": f"docs/{doc_id}/chunks/chunk-{idx:04d}.pdf",
+            "meta_key": f"docs/{doc_id}/chunks/chunk-{idx:04d}.json",
+            "job_id": None, "status": "queued",
+        })
+    return manifest
+
+
+def enqueue_split_jobs(manifests: List[Dict[str, Any]]) -> int:
+    """
+    Enqueue job split untuk semua chunk dari banyak manifest sekaligus
+    (satu pipeline Redis), isi job_id ke manifest. Return jumlah job.
+    """
+    q = get_queue("docs")
+    job_datas = []
+    for manifest in manifests:
+        doc_id = manifest["doc_id"]
+        original_key = manifest["original"]["key"]
+        for ch in manifest["chunks"]:
+            ch["job_id"] = uuid4().hex
+            job_datas.append(q.prepare_data(
+                SPLIT_TASK,
+                args=(original_key, doc_id, ch["index"], ch["start_page"], ch["end_page"],
+                      ch["expected_key"], ch["meta_key"], manifest.get("batch_id")),
+                job_id=ch["job_id"],
+                timeout=20 * 60,
+                retry=Retry(max=3, interval=[10, 30, 60]),
+            ))
+    if job_datas:
+        q.enqueue_many(job_datas)
+    return len(job_datas)
+
+
+def save_manifest(manifest: Dict[str, Any]):
+    put_bytes(manifest_key(manifest["doc_id"]),
+              json.dumps(manifest, ensure_ascii=False, indent=2).encode(),
+              content_type="application/json")
@@ -0,0 +1,67 @@
+import os
+import time
+from typing import List, Dict, Any
+
+import fitz
+
+from app.services.storage import BUCKET, get_object_to_tempfile, put_jsonl_lines
+
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "eng")
+
+
+def extract_chunk_pages_ocr_to_jsonl(
+        *,
+        doc_id: str,
+        chunk_index: int,
+        chunk_pdf_key: str,
+        out_jsonl_key: str,
+        page_offset: int,  # halaman awal untuk chunk ini (1-based)
+        page_nos: List[int],  # nomor halaman absolut yang diklasifikasi "image_only"
+        dpi: int = OCR_DPI,
+        language: str = OCR_LANGUAGE,
+) -> Dict[str, Any]:
+    """
+    OCR halaman hasil scan (tanpa text layer) dari sebuah chunk PDF via Tesseract (PyMuPDF),
+    tulis JSONL dengan skema record yang sama dengan extractor pdfplumber.
+    """
+    t0 = time.time()
+    ts: List[Dict[str, Any]] = []
+    src_path = get_object_to_tempfile(BUCKET, chunk_pdf_key)
+
+    with fitz.open(src_path) as pdf:
+        for page_no in page_nos:
+            p_start = time.time()
+            page = pdf[page_no - page_offset]
+
+            tp = page.get_textpage_ocr(dpi=dpi, language=language, full=True)
+            txt = page.get_text("text", textpage=tp) or ""
+            text_blocks = [{"type": "paragraph", "content": txt}] if txt.strip() else []
+
+            ts.append({
+                "doc_id": doc_id,
+                "chunk_index": chunk_index,
+                "page_no": page_no,
+                "extract_method": "pymupdf_ocr",
+                "source_key": chunk_pdf_key,
+                "text_blocks": text_blocks,
+                "tables": [],
+                "combined_markdown": txt.strip(),
+                "stats": {
+                    "char_count": len(txt),
+                    "word_count": len(txt.split()) if txt else 0,
+                    "tables_detected": 0,
+                    "extract_duration_ms": int(1000 * (time.time() - p_start)),
+                },
+                "version": "1.0.0",
+            })
+
+    put_jsonl_lines(out_jsonl_key, ts)
+
+    return {
+        "doc_id": doc_id,
+        "chunk_index": chunk_index,
+        "pages_written": len(ts),
+        "out_jsonl_key": out_jsonl_key,
+        "duration_ms": int(1000 * (time.time() - t0)),
+    }
@@ -0,0 +1,93 @@
+from typing import Dict, Any
+
+PAGE_CLASS_TEXT = "text"
+PAGE_CLASS_IMAGE_ONLY = "image_only"
+PAGE_CLASS_BLANK = "blank"
+
+# ambang batas heuristik (murah, tanpa render)
+MIN_TEXT_CHARS = 16
+MIN_IMAGE_COVERAGE = 0.05
+MAX_BLANK_CONTENT_BYTES = 64
+# scan satu halaman penuh yang text layer-nya hanya stamp (Bates/confidential) -> tetap OCR.
+# teks asli di atas background penuh (slide, kop surat) tetap lewat jalur teks.
+SCAN_IMAGE_COVERAGE = 0.8
+MAX_STAMP_CHARS = 64  # stamp satu baris, mis. "CONFIDENTIAL ACME-000123"
+STAMP_MARGIN = 0.12  # pita tepi halaman (fraksi lebar/tinggi) tempat stamp biasa diletakkan
+
+
+def _image_coverage(page) -> float:
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height
+    if page_area <= 0:
+        return 0.0
+
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = page_rect & info["bbox"]  # clip ke area halaman
+        if bbox.is_empty:
+            continue
+        covered += bbox.width * bbox.height
+    return min(covered / page_area, 1.0)
+
+
+def _content_bytes(page) -> int:
+    # read_contents() gagal (AssertionError) untuk halaman tanpa /Contents, mis. halaman kosong pemisah
+    xrefs = page.get_contents()
+    if not xrefs:
+        return 0
+    return sum(len(page.parent.xref_stream(xref) or b"") for xref in xrefs)
+
+
+def _is_stamp_only(page, text: str) -> bool:
+    """
+    True kalau text layer hanya stamp: satu baris pendek, atau semua blok teks ada di margin halaman.
+    """
+    if len(text) <= MAX_STAMP_CHARS and "\n" not in text:
+        return True
+
+    rect = page.rect
+    mx, my = rect.width * STAMP_MARGIN, rect.height * STAMP_MARGIN
+    for x0, y0, x1, y1, block_text, _, block_type in page.get_text("blocks"):
+        if block_type != 0 or not block_text.strip():
+            continue
+        in_margin = (
+            y1 <= rect.y0 + my or y0 >= rect.y1 - my
+            or x1 <= rect.x0 + mx or x0 >= rect.x1 - mx
+        )
+        if not in_margin:
+            return False
+    return True
+
+
+def classify_page(page) -> Dict[str, Any]:
+    """
+    Klasifikasi cepat sebuah halaman PyMuPDF: "text" | "image_only" | "blank".
+    Dipakai saat split supaya extractor bisa skip halaman kosong
+    dan mengarahkan halaman hasil scan ke antrian OCR.
+    """
+    text = (page.get_text("text") or "").strip()
+    text_chars = len(text)
+    image_coverage = _image_coverage(page)
+    content_bytes = _content_bytes(page)
+
+    if image_coverage >= SCAN_IMAGE_COVERAGE and _is_stamp_only(page, text):
+        page_class = PAGE_CLASS_IMAGE_ONLY
+    elif text_chars >= MIN_TEXT_CHARS:
+        page_class = PAGE_CLASS_TEXT
+    elif image_coverage >= MIN_IMAGE_COVERAGE:
+        page_class = PAGE_CLASS_IMAGE_ONLY
+    elif text_chars == 0 and content_bytes <= MAX_BLANK_CONTENT_BYTES:
+        page_class = PAGE_CLASS_BLANK
+    elif text_chars > 0:
+        # sedikit teks tanpa gambar (mis. "Page 3") -> tetap lewat jalur teks
+        page_class = PAGE_CLASS_TEXT
+    else:
+        # hanya vector drawing tanpa text layer (mis. font di-outline)
+        page_class = PAGE_CLASS_IMAGE_ONLY
+
+    return {
+        "class": page_class,
+        "text_chars": text_chars,
+        "image_coverage": round(image_coverage, 4),
+        "content_bytes": content_bytes,
+    }
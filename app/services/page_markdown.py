@@ -0,0 +1,27 @@
+from typing import List, Dict, Any
+
+
+def tables_to_markdown(tables: List[List[List[str]]]) -> List[Dict[str, Any]]:
+    md_tables = []
+    for t in tables:
+        if not t:
+            continue
+        # asumsi baris pertama = header
+        header = [str(x).strip() if x is not None else "" for x in t[0]]
+        rows = [[str(x).strip() if x is not None else "" for x in r] for r in t[1:]]
+        # build markdown
+        header_line = "| " + " | ".join(header) + " |"
+        sep_line = "| " + " | ".join([":--" for _ in header]) + " |"
+        row_lines = ["| " + " | ".join(r) + " |" for r in rows]
+        md = "\n".join([header_line, sep_line] + row_lines)
+        md_tables.append({"title": None, "markdown": md, "header": header, "rows": rows})
+    return md_tables
+
+
+def build_combined_markdown(text_blocks: List[Dict[str, str]], tables_md: List[Dict[str, Any]]) -> str:
+    parts = []
+    if text_blocks:
+        parts.append("\n\n".join(tb["content"] for tb in text_blocks if tb.get("content")))
+    for i, t in enumerate(tables_md, start=1):
+        parts.append(f"### Table {i}\n{t['markdown']}")
+    return "\n\n".join([p for p in parts if p])
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+
+from app.services.storage import BUCKET, get_minio_client, get_json_from_minio, get_bytes, put_bytes
+
+PREVIEW_CACHE_DIR = os.getenv("PREVIEW_CACHE_DIR", os.path.join(tempfile.gettempdir(), "docai-previews"))
+PREVIEW_LRU_MAX_BYTES = int(os.getenv("PREVIEW_LRU_MAX_BYTES", str(64 * 1024 * 1024)))
+PREVIEW_DISK_MAX_BYTES = int(os.getenv("PREVIEW_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+# resolusi yang di-render & disimpan; request lain dibulatkan ke yang terdekat
+# supaya jumlah render / object storage per halaman tetap terbatas
+PREVIEW_DPIS = (72, 150)
+PREVIEW_PRERENDER_DPI = int(os.getenv("PREVIEW_PRERENDER_DPI", "72"))  # 0 = tanpa pre-render saat split
+
+
+class PageNotFound(Exception):
+    pass
+
+
+class _ByteLRU:
+    """
+    LRU in-process dengan batas total byte (bukan jumlah entry).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[str, bytes] | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data.move_to_end(key)
+            return item
+
+    def put(self, key: str, etag: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= len(old[1])
+            self._data[key] = (etag, data)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._size -= len(evicted)
+
+
+_lru = _ByteLRU(PREVIEW_LRU_MAX_BYTES)
+
+
+def snap_preview_dpi(dpi: int) -> int:
+    return min(PREVIEW_DPIS, key=lambda d: (abs(d - dpi), d))
+
+
+def _etag(data: bytes) -> str:
+    # strong ETag: hash isi gambar
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def preview_key(doc_id: str, page_no: int, dpi: int) -> str:
+    return f"docs/{doc_id}/previews/page-{page_no:05d}-{dpi}dpi.png"
+
+
+def _disk_path(doc_id: str, page_no: int, dpi: int) -> str:
+    return os.path.join(PREVIEW_CACHE_DIR, doc_id, f"page-{page_no:05d}-{dpi}dpi.png")
+
+
+# perkiraan ukuran cache disk (per proses); None = belum pernah di-scan
+_disk_bytes: int | None = None
+_disk_lock = threading.Lock()
+
+
+def _prune_disk(target_bytes: int) -> int:
+    """
+    Hapus file cache paling lama tidak dipakai (mtime, di-bump saat hit) sampai total <= target_bytes.
+    Return total byte yang tersisa. Aman dijalankan beberapa proses sekaligus.
+    """
+    files = []
+    for root, _, names in os.walk(PREVIEW_CACHE_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= target_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+    return total
+
+
+def _write_disk(path: str, data: bytes):
+    global _disk_bytes
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)  # atomic, pembaca tidak pernah melihat file setengah jadi
+
+    with _disk_lock:
+        if _disk_bytes is None:
+            _disk_bytes = _prune_disk(PREVIEW_DISK_MAX_BYTES)
+        else:
+            _disk_bytes += len(data)
+        if _disk_bytes > PREVIEW_DISK_MAX_BYTES:
+            # turun ke 90% supaya scan tidak terjadi di setiap write
+            _disk_bytes = _prune_disk(int(PREVIEW_DISK_MAX_BYTES * 0.9))
+
+
+def render_page_png(pdf_bytes: bytes, page_index: int, dpi: int) -> bytes:
+    import fitz  # lazy: hanya path render yang butuh PyMuPDF
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf:
+        pix = pdf[page_index].get_pixmap(dpi=dpi)
+        return pix.tobytes("png")
+
+
+def render_chunk_previews(doc_id: str, chunk_pdf_bytes: bytes, start_page: int, dpi: int) -> int:
+    """
+    Render semua halaman satu chunk ke tier storage (batch pre-render setelah split).
+    """
+    import fitz
+
+    dpi = snap_preview_dpi(dpi)
+
+    n = 0
+    with fitz.open(stream=chunk_pdf_bytes, filetype="pdf") as pdf:
+        for i, page in enumerate(pdf):
+            png = page.get_pixmap(dpi=dpi).tobytes("png")
+            put_bytes(preview_key(doc_id, start_page + i, dpi), png, content_type="image/png")
+            n += 1
+    return n
+
+
+def _chunk_for_page(doc_id: str, page_no: int) -> Dict[str, Any]:
+    manifest = get_json_from_minio(get_minio_client(), BUCKET, f"docs/{doc_id}/manifest.json")
+    if not manifest:
+        raise PageNotFound("manifest not found")
+    for ch in manifest.get("chunks", []):
+        if ch["start_page"] <= page_no <= ch["end_page"]:
+            return ch
+    raise PageNotFound("page out of range")
+
+
+def get_page_preview(doc_id: str, page_no: int, dpi: int) -> Tuple[str, bytes]:
+    """
+    Return (etag, png). Urutan tier: LRU in-process -> disk lokal -> storage -> render.
+    Setiap tier yang miss diisi ulang dari tier di bawahnya.
+    dpi dibulatkan ke PREVIEW_DPIS.
+    """
+    dpi = snap_preview_dpi(dpi)
+    cache_key = f"{doc_id}/{page_no}/{dpi}"
+    hit = _lru.get(cache_key)
+    if hit is not None:
+        return hit
+
+    path = _disk_path(doc_id, page_no, dpi)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # LRU disk berdasarkan mtime
+        etag = _etag(data)
+        _lru.put(cache_key, etag, data)
+        return etag, data
+    except OSError:
+        pass
+
+    try:
+        data = get_bytes(preview_key(doc_id, page_no, dpi))
+    except Exception:
+        ch = _chunk_for_page(doc_id, page_no)
+        try:
+            chunk_pdf = get_bytes(ch["expected_key"])
+        except Exception:
+            raise PageNotFound("chunk not split yet")
+        data = render_page_png(chunk_pdf, page_no - ch["start_page"], dpi)
+        put_bytes(preview_key(doc_id, page_no, dpi), data, content_type="image/png")
+
+    etag = _etag(data)
+    try:
+        _write_disk(path, data)
+    except OSError:
+        pass  # disk cache opsional
+    _lru.put(cache_key, etag, data)
+    return etag, data
@@ -1,9 +1,16 @@
+import hashlib
+import json
 import time
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any
 
 import pdfplumber
 
-from app.services.storage import BUCKET, get_object_to_tempfile, put_jsonl_lines
+from app.services.page_classifier import PAGE_CLASS_TEXT, PAGE_CLASS_BLANK, PAGE_CLASS_IMAGE_ONLY
+from app.services.page_markdown import tables_to_markdown, build_combined_markdown
+from app.services.storage import (
+    BUCKET, get_minio_client, get_json_from_minio, get_object_etag, get_object_to_tempfile,
+    put_bytes, put_jsonl_lines,
+)
 
 DEFAULT_TABLE_SETTINGS = {
     "vertical_strategy": "lines",
@@ -13,31 +20,66 @@ DEFAULT_TABLE_SETTINGS = {
     "edge_min_length": 3,
 }
 
+TEXT_SETTINGS = {"x_tolerance": 1.5, "y_tolerance": 2.0}
+
+# naikkan versi stage tertentu kalau logikanya berubah -> hanya stage itu yang dijalankan ulang
+STAGE_VERSIONS = {"text": "1", "words": "1", "tables": "1"}
+STAGES = ("text", "words", "tables")
+
+
+def _blank_page_record(*, doc_id: str, chunk_index: int, page_no: int, chunk_pdf_key: str) -> Dict[str, Any]:
+    return {
+        "doc_id": doc_id,
+        "chunk_index": chunk_index,
+        "page_no": page_no,
+        "extract_method": "blank_skipped",
+        "source_key": chunk_pdf_key,
+        "text_blocks": [],
+        "tables": [],
+        "combined_markdown": "",
+        "stats": {"char_count": 0, "word_count": 0, "tables_detected": 0, "extract_duration_ms": 0},
+        "version": "1.0.0",
+    }
+
+
+def _stage_settings(stage: str, table_settings: Dict[str, Any]) -> Dict[str, Any]:
+    return table_settings if stage == "tables" else TEXT_SETTINGS
+
+
+def _stage_fingerprint(stage: str, settings: Dict[str, Any], source_etag: str | None) -> str:
+    raw = json.dumps(
+        {"stage": stage, "version": STAGE_VERSIONS[stage], "settings": settings, "source": source_etag},
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
 
-def _tables_to_markdown(tables: List[List[List[str]]]) -> List[Dict[str, Any]]:
-    md_tables = []
-    for t in tables:
-        if not t:
-            continue
-        # asumsi baris pertama = header
-        header = [str(x).strip() if x is not None else "" for x in t[0]]
-        rows = [[str(x).strip() if x is not None else "" for x in r] for r in t[1:]]
-        # build markdown
-        header_line = "| " + " | ".join(header) + " |"
-        sep_line = "| " + " | ".join([":--" for _ in header]) + " |"
-        row_lines = ["| " + " | ".join(r) + " |" for r in rows]
-        md = "\n".join([header_line, sep_line] + row_lines)
-        md_tables.append({"title": None, "markdown": md, "header": header, "rows": rows})
-    return md_tables
-
-
-def _build_combined_markdown(text_blocks: List[Dict[str, str]], tables_md: List[Dict[str, Any]]) -> str:
-    parts = []
-    if text_blocks:
-        parts.append("\n\n".join(tb["content"] for tb in text_blocks if tb.get("content")))
-    for i, t in enumerate(tables_md, start=1):
-        parts.append(f"### Table {i}\n{t['markdown']}")
-    return "\n\n".join([p for p in parts if p])
+
+def _artifact_key(doc_id: str, chunk_index: int, stage: str, fingerprint: str) -> str:
+    return f"docs/{doc_id}/artifacts/chunk-{chunk_index:04d}/{stage}-{fingerprint}.json"
+
+
+def _run_stage(page, stage: str, settings: Dict[str, Any]):
+    if stage == "text":
+        return page.extract_text(**settings) or ""
+    if stage == "words":
+        return [
+            {"text": w["text"], "x0": round(w["x0"], 2), "top": round(w["top"], 2),
+             "x1": round(w["x1"], 2), "bottom": round(w["bottom"], 2)}
+            for w in page.extract_words(**settings)
+        ]
+    if stage == "tables":
+        return page.extract_tables(table_settings=settings) or []
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def _load_stage_artifact(key: str, page_nos: List[int]) -> Dict[str, Any] | None:
+    """
+    Artifact valid hanya kalau memuat semua halaman teks yang dibutuhkan.
+    """
+    art = get_json_from_minio(get_minio_client(), BUCKET, key)
+    if not art or any(str(p) not in art.get("pages", {}) for p in page_nos):
+        return None
+    return art["pages"]
 
 
 def extract_chunk_pdf_to_jsonl(
@@ -48,62 +90,155 @@ def extract_chunk_pdf_to_jsonl(
         out_jsonl_key: str,
         page_offset: int,  # halaman awal untuk chunk ini (1-based)
         table_settings: Dict[str, Any] | None = None,
+        page_classes: List[str] | None = None,  # dari meta split, sejajar dengan halaman chunk
+        page_count: int | None = None,  # dari manifest (end_page - start_page + 1)
+        commit_guard: Callable[[], bool] | None = None,
 ) -> Dict[str, Any]:
     """
     Ekstrak sebuah chunk PDF menjadi JSONL (baris per halaman) dan upload ke MinIO.
+    Halaman "blank" langsung ditulis kosong tanpa parsing; halaman "image_only"
+    dilewati karena ditangani antrian OCR.
+
+    Hasil tiap stage (text, words, tables) disimpan per halaman sebagai artifact
+    dengan fingerprint settings-nya sendiri. Saat re-extract, stage yang artifact-nya
+    masih cocok diambil dari cache; chunk PDF hanya di-download kalau ada stage yang
+    harus dijalankan ulang. combined_markdown selalu dirakit ulang dari potongan stage.
+
+    commit_guard dipanggil tepat sebelum menulis JSONL; kalau False (attempt lain sudah
+    menang), hasil dibuang supaya duplikat spekulatif tidak menimpa chunk-XXXX.jsonl.
     Return ringkasan meta.
     """
     t0 = time.time()
     ts: List[Dict[str, Any]] = []
-    src_path = get_object_to_tempfile(BUCKET, chunk_pdf_key)
+    skipped = {PAGE_CLASS_BLANK: 0, PAGE_CLASS_IMAGE_ONLY: 0}
 
     if table_settings is None:
         table_settings = DEFAULT_TABLE_SETTINGS
 
-    with pdfplumber.open(src_path) as pdf:
-        for i, page in enumerate(pdf.pages, start=0):
-            page_no = page_offset + i
-            p_start = time.time()
-
-            # extract text
-            txt = page.extract_text(x_tolerance=1.5, y_tolerance=2.0) or ""
-            text_blocks = []
-            if txt:
-                # bisa dipecah per paragraf jika mau; sekarang single block
-                text_blocks = [{"type": "paragraph", "content": txt}]
-
-            # extract tables
-            raw_tables = page.extract_tables(table_settings=table_settings) or []
-            tables_md = _tables_to_markdown(raw_tables)
-
-            combined_md = _build_combined_markdown(text_blocks, tables_md)
-
-            stats = {
-                "char_count": len(txt),
-                "word_count": len(txt.split()) if txt else 0,
-                "tables_detected": len(raw_tables),
-                "extract_duration_ms": int(1000 * (time.time() - p_start)),
-            }
-
-            ts.append({
-                "doc_id": doc_id,
-                "chunk_index": chunk_index,
-                "page_no": page_no,
-                "extract_method": "pdfplumber_mixed",
-                "source_key": chunk_pdf_key,
-                "text_blocks": text_blocks,
-                "tables": tables_md,
-                "combined_markdown": combined_md,
-                "stats": stats,
-                "version": "1.0.0",
-            })
+    src_path = None
+    classes = list(page_classes or [])
+    if not classes and page_count:
+        # chunk lama tanpa klasifikasi -> semua halaman diproses sebagai teks
+        classes = [PAGE_CLASS_TEXT] * page_count
+    elif not classes:
+        # payload lama tanpa page_count -> terpaksa buka PDF untuk menghitung halaman
+        src_path = get_object_to_tempfile(BUCKET, chunk_pdf_key)
+        with pdfplumber.open(src_path) as pdf:
+            classes = [PAGE_CLASS_TEXT] * len(pdf.pages)
+
+    text_page_nos = [page_offset + i for i, cls in enumerate(classes) if cls == PAGE_CLASS_TEXT]
+
+    # stage artifacts: ambil yang masih valid, sisanya dijalankan ulang
+    stage_results: Dict[str, Dict[str, Any]] = {}
+    fingerprints: Dict[str, str] = {}
+    stages_cached: List[str] = []
+    stages_run: List[str] = []
+    page_durations: Dict[int, int] = {}
+
+    if text_page_nos:
+        source_etag = get_object_etag(chunk_pdf_key)
+        for stage in STAGES:
+            fp = _stage_fingerprint(stage, _stage_settings(stage, table_settings), source_etag)
+            fingerprints[stage] = fp
+            cached = _load_stage_artifact(_artifact_key(doc_id, chunk_index, stage, fp), text_page_nos)
+            if cached is not None:
+                stage_results[stage] = cached
+                stages_cached.append(stage)
+            else:
+                stage_results[stage] = {}
+                stages_run.append(stage)
+
+        if stages_run:
+            if src_path is None:
+                src_path = get_object_to_tempfile(BUCKET, chunk_pdf_key)
+            with pdfplumber.open(src_path) as pdf:
+                for page_no in text_page_nos:
+                    p_start = time.time()
+                    page = pdf.pages[page_no - page_offset]
+                    for stage in stages_run:
+                        stage_results[stage][str(page_no)] = _run_stage(
+                            page, stage, _stage_settings(stage, table_settings))
+                    page_durations[page_no] = int(1000 * (time.time() - p_start))
+
+            for stage in stages_run:
+                art = {
+                    "doc_id": doc_id,
+                    "chunk_index": chunk_index,
+                    "stage": stage,
+                    "fingerprint": fingerprints[stage],
+                    "settings": _stage_settings(stage, table_settings),
+                    "pages": stage_results[stage],
+                }
+                put_bytes(_artifact_key(doc_id, chunk_index, stage, fingerprints[stage]),
+                          json.dumps(art, ensure_ascii=False).encode("utf-8"),
+                          content_type="application/json")
+
+    # rakit record per halaman dari hasil stage
+    for i, cls in enumerate(classes):
+        page_no = page_offset + i
+        if cls == PAGE_CLASS_BLANK:
+            skipped[cls] += 1
+            ts.append(_blank_page_record(doc_id=doc_id, chunk_index=chunk_index,
+                                         page_no=page_no, chunk_pdf_key=chunk_pdf_key))
+            continue
+        if cls == PAGE_CLASS_IMAGE_ONLY:
+            skipped[cls] += 1
+            continue
+
+        txt = stage_results["text"][str(page_no)]
+        text_blocks = []
+        if txt:
+            # bisa dipecah per paragraf jika mau; sekarang single block
+            text_blocks = [{"type": "paragraph", "content": txt}]
+
+        raw_tables = stage_results["tables"][str(page_no)]
+        tables_md = tables_to_markdown(raw_tables)
+
+        combined_md = build_combined_markdown(text_blocks, tables_md)
+
+        stats = {
+            "char_count": len(txt),
+            "word_count": len(txt.split()) if txt else 0,
+            "tables_detected": len(raw_tables),
+            "extract_duration_ms": page_durations.get(page_no, 0),
+            "stages_cached": stages_cached,
+        }
+
+        ts.append({
+            "doc_id": doc_id,
+            "chunk_index": chunk_index,
+            "page_no": page_no,
+            "extract_method": "pdfplumber_mixed",
+            "source_key": chunk_pdf_key,
+            "text_blocks": text_blocks,
+            "tables": tables_md,
+            "combined_markdown": combined_md,
+            "stats": stats,
+            "stage_fingerprints": fingerprints,
+            "version": "1.0.0",
+        })
+
+    if commit_guard is not None and not commit_guard():
+        return {
+            "doc_id": doc_id,
+            "chunk_index": chunk_index,
+            "status": "superseded",
+            "pages_written": 0,
+            "out_jsonl_key": out_jsonl_key,
+            "duration_ms": int(1000 * (time.time() - t0)),
+        }
 
     put_jsonl_lines(out_jsonl_key, ts)
 
     return {
         "doc_id": doc_id,
         "chunk_index": chunk_index,
+        "status": "done",
         "pages_written": len(ts),
+        "pages_blank": skipped[PAGE_CLASS_BLANK],
+        "pages_routed_ocr": skipped[PAGE_CLASS_IMAGE_ONLY],
+        "stages_run": stages_run,
+        "stages_cached": stages_cached,
         "out_jsonl_key": out_jsonl_key,
         "duration_ms": int(1000 * (time.time() - t0)),
     }
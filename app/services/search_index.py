@@ -0,0 +1,296 @@
+import hashlib
+import html
+import os
+import re
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Dict, Any, Iterable
+
+from rq import Retry, get_current_job
+
+from app.services.rq_conn import get_queue, get_redis_connection
+from app.services.storage import get_jsonl_lines, get_object_etag, list_keys
+
+SEARCH_INDEX_DIR = os.getenv("SEARCH_INDEX_DIR", "/app/_data/search")
+SEARCH_SHARDS = int(os.getenv("SEARCH_SHARDS", "8"))
+
+PENDING_KEY = "search:pending"
+FLUSH_SCHEDULED_KEY = "search:flush-scheduled"
+FLUSH_DELAY_S = int(os.getenv("SEARCH_FLUSH_DELAY_S", "5"))
+INDEX_BATCH_SIZE = 200
+PROCESSING_KEY_PREFIX = "search:processing:"
+
+# texts-dedup/ (hasil pass boilerplate) menggantikan texts/ untuk chunk yang sama
+TEXTS_KEY_RE = re.compile(r"^docs/([^/]+)/texts(-dedup)?/chunk-\d+(\.ocr)?\.jsonl$")
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# marker snippet (STX/ETX, dibuang dari body saat index) supaya highlight dipasang setelah teks di-escape
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+_MARK_STRIP = str.maketrans("", "", _MARK_OPEN + _MARK_CLOSE)
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    body,
+    doc_id UNINDEXED,
+    page_no UNINDEXED,
+    chunk_index UNINDEXED,
+    jsonl_key UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+-- jsonl_key -> rowid FTS, supaya hapus per chunk tidak full-scan kolom UNINDEXED
+CREATE TABLE IF NOT EXISTS chunk_rows (
+    jsonl_key TEXT NOT NULL,
+    page_rowid INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunk_rows_key ON chunk_rows (jsonl_key);
+"""
+
+_search_pool = ThreadPoolExecutor(max_workers=SEARCH_SHARDS)
+
+
+def _shard_of(doc_id: str) -> int:
+    return int(hashlib.sha1(doc_id.encode("utf-8")).hexdigest()[:8], 16) % SEARCH_SHARDS
+
+
+def _shard_path(shard: int) -> str:
+    return os.path.join(SEARCH_INDEX_DIR, f"shard-{shard:02d}.sqlite")
+
+
+def _connect_rw(shard: int) -> sqlite3.Connection:
+    os.makedirs(SEARCH_INDEX_DIR, exist_ok=True)
+    conn = sqlite3.connect(_shard_path(shard), timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _doc_id_from_key(jsonl_key: str) -> str | None:
+    m = TEXTS_KEY_RE.match(jsonl_key)
+    return m.group(1) if m else None
+
+
+def _canonical_key(jsonl_key: str) -> str:
+    # posting disimpan per chunk texts/, apa pun sumbernya (texts/ atau texts-dedup/)
+    return jsonl_key.replace("/texts-dedup/", "/texts/", 1)
+
+
+def _replace_chunk_rows(conn: sqlite3.Connection, source_key: str):
+    """
+    Hapus posting lama untuk chunk ini (lewat rowid) lalu tulis ulang dari source_key
+    (idempotent untuk re-extract). Object yang sudah tidak ada di storage cukup dihapus dari index.
+    """
+    jsonl_key = _canonical_key(source_key)
+    conn.execute(
+        "DELETE FROM pages WHERE rowid IN (SELECT page_rowid FROM chunk_rows WHERE jsonl_key = ?)",
+        (jsonl_key,))
+    conn.execute("DELETE FROM chunk_rows WHERE jsonl_key = ?", (jsonl_key,))
+
+    try:
+        records = get_jsonl_lines(source_key)
+    except Exception:
+        if get_object_etag(source_key) is None:
+            return
+        raise
+
+    rowids = []
+    for r in records:
+        if not r.get("combined_markdown"):
+            continue
+        body = r["combined_markdown"].translate(_MARK_STRIP)
+        cur = conn.execute(
+            "INSERT INTO pages (body, doc_id, page_no, chunk_index, jsonl_key) VALUES (?, ?, ?, ?, ?)",
+            (body, r["doc_id"], r["page_no"], r.get("chunk_index"), jsonl_key))
+        rowids.append((jsonl_key, cur.lastrowid))
+    conn.executemany("INSERT INTO chunk_rows (jsonl_key, page_rowid) VALUES (?, ?)", rowids)
+
+
+def _index_shard_keys(shard: int, jsonl_keys: Iterable[str], truncate: bool = False) -> int:
+    conn = _connect_rw(shard)
+    n = 0
+    try:
+        conn.execute("BEGIN")
+        if truncate:
+            conn.execute("DELETE FROM pages")
+            conn.execute("DELETE FROM chunk_rows")
+        for key in jsonl_keys:
+            _replace_chunk_rows(conn, key)
+            n += 1
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return n
+
+
+# =============================
+# update inkremental (dipanggil dari worker extraction)
+# =============================
+
+def queue_chunk_for_index(jsonl_key: str):
+    """
+    Antrikan chunk JSONL yang baru selesai untuk di-index. Update dikumpulkan di Redis
+    dan di-flush per batch oleh satu job terjadwal di antrian "index".
+    Key terakhir yang diantrikan untuk satu chunk menang: texts/ setelah (re-)extract,
+    texts-dedup/ setelah pass boilerplate.
+    """
+    conn = get_redis_connection()
+    conn.rpush(PENDING_KEY, jsonl_key)
+    if conn.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=10 * 60):
+        get_queue("index").enqueue_in(
+            timedelta(seconds=FLUSH_DELAY_S),
+            "app.services.search_index.flush_pending_index_updates",
+            retry=Retry(max=3, interval=[10, 30, 60]),
+        )
+
+
+def _processing_key() -> str:
+    job = get_current_job()
+    return f"{PROCESSING_KEY_PREFIX}{job.id if job else 'local'}"
+
+
+def _claim_batch(conn, proc_key: str) -> List[bytes]:
+    """
+    Pindahkan maksimal INDEX_BATCH_SIZE key dari pending ke processing list (LMOVE, atomic per key).
+    Sisa dari attempt sebelumnya (worker mati di tengah) diproses dulu.
+    """
+    leftover = conn.lrange(proc_key, 0, -1)
+    if leftover:
+        return leftover
+    pipe = conn.pipeline(transaction=False)
+    for _ in range(INDEX_BATCH_SIZE):
+        pipe.lmove(PENDING_KEY, proc_key, "LEFT", "RIGHT")
+    return [k for k in pipe.execute() if k is not None]
+
+
+def flush_pending_index_updates() -> dict:
+    conn = get_redis_connection()
+    # hapus flag dulu: update yang masuk setelah ini akan menjadwalkan flush baru
+    conn.delete(FLUSH_SCHEDULED_KEY)
+    proc_key = _processing_key()
+
+    indexed = 0
+    while True:
+        batch = _claim_batch(conn, proc_key)
+        if not batch:
+            break
+        # canonical key -> source key terakhir, urut antrian
+        by_shard: Dict[int, Dict[str, str]] = defaultdict(dict)
+        for raw in batch:
+            key = raw.decode()
+            doc_id = _doc_id_from_key(key)
+            if doc_id:
+                keys = by_shard[_shard_of(doc_id)]
+                keys.pop(_canonical_key(key), None)
+                keys[_canonical_key(key)] = key
+        try:
+            for shard, keys in by_shard.items():
+                indexed += _index_shard_keys(shard, list(keys.values()))
+        except Exception:
+            # kembalikan ke pending supaya retry / flush berikutnya mengambilnya lagi
+            while conn.lmove(proc_key, PENDING_KEY, "RIGHT", "LEFT") is not None:
+                pass
+            raise
+        # ack: baru dibuang setelah semua shard di batch ini COMMIT
+        conn.delete(proc_key)
+
+    return {"indexed_chunks": indexed}
+
+
+def rebuild_search_index(prefix: str = "docs/") -> dict:
+    """
+    Bangun ulang semua shard dari storage; tiap shard dikerjakan paralel di thread sendiri
+    dalam satu transaksi, jadi pembaca tetap melihat index lama sampai commit.
+    Chunk yang punya versi texts-dedup/ di-index dari versi itu.
+    """
+    by_shard: Dict[int, Dict[str, str]] = defaultdict(dict)
+    for key in list_keys(prefix):
+        doc_id = _doc_id_from_key(key)
+        if not doc_id:
+            continue
+        keys = by_shard[_shard_of(doc_id)]
+        canonical = _canonical_key(key)
+        if key != canonical or canonical not in keys:
+            keys[canonical] = key
+
+    with ThreadPoolExecutor(max_workers=SEARCH_SHARDS) as pool:
+        futures = {
+            shard: pool.submit(_index_shard_keys, shard, list(by_shard.get(shard, {}).values()), True)
+            for shard in range(SEARCH_SHARDS)
+        }
+        counts = {shard: f.result() for shard, f in futures.items()}
+
+    return {"shards": SEARCH_SHARDS, "indexed_chunks": sum(counts.values())}
+
+
+# =============================
+# query
+# =============================
+
+def _to_match_query(q: str) -> str | None:
+    tokens = TOKEN_RE.findall(q or "")
+    if not tokens:
+        return None
+    # quote setiap token supaya input user tidak dibaca sebagai sintaks FTS5
+    return " ".join('"{}"'.format(t.replace('"', "")) for t in tokens)
+
+
+def _snippet_html(snip: str) -> str:
+    # teks PDF tidak dipercaya: escape dulu, baru marker diganti <mark>
+    snip = html.escape(snip or "", quote=False)
+    return snip.replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def _search_shard(shard: int, match: str, limit: int, doc_id: str | None) -> List[Dict[str, Any]]:
+    path = _shard_path(shard)
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=5)
+    try:
+        sql = (
+            "SELECT doc_id, page_no, chunk_index, bm25(pages) AS score, "
+            "snippet(pages, 0, ?, ?, '…', 16) "
+            "FROM pages WHERE pages MATCH ?"
+        )
+        params: list = [_MARK_OPEN, _MARK_CLOSE, match]
+        if doc_id:
+            sql += " AND doc_id = ?"
+            params.append(doc_id)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        rows = conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError as e:
+        # shard belum pernah di-index (tabel belum ada); locked / corrupt tetap error
+        if str(e).startswith("no such table"):
+            return []
+        raise
+    finally:
+        conn.close()
+
+    return [
+        {"doc_id": d, "page_no": p, "chunk_index": c, "score": s, "snippet": _snippet_html(snip)}
+        for d, p, c, s, snip in rows
+    ]
+
+
+def search_pages(q: str, limit: int = 20, doc_id: str | None = None) -> List[Dict[str, Any]]:
+    """
+    Full-text search dengan ranking BM25 di semua shard.
+    Skor BM25 dihitung per shard (statistik lokal), cukup untuk ranking gabungan.
+    """
+    match = _to_match_query(q)
+    if not match:
+        return []
+
+    shards = [_shard_of(doc_id)] if doc_id else range(SEARCH_SHARDS)
+    hits: List[Dict[str, Any]] = []
+    for res in _search_pool.map(lambda s: _search_shard(s, match, limit, doc_id), shards):
+        hits.extend(res)
+
+    hits.sort(key=lambda h: h["score"])  # bm25() FTS5: makin kecil makin relevan
+    for h in hits:
+        h["score"] = round(-h["score"], 6)
+    return hits[:limit]
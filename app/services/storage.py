@@ -2,7 +2,7 @@ import io
 import json
 import os
 import tempfile
-from typing import Iterable
+from typing import Iterable, Iterator, List
 
 from minio import Minio
 from minio.error import S3Error
@@ -52,6 +52,16 @@ def put_stream(key: str, fileobj, length: int | None, content_type: str):
         c.put_object(BUCKET, key, fileobj, length, content_type=content_type)
 
 
+def get_bytes(key: str) -> bytes:
+    c = get_minio_client()
+    resp = c.get_object(BUCKET, key)
+    try:
+        return resp.read()
+    finally:
+        resp.close()
+        resp.release_conn()
+
+
 def get_json_from_minio(client: Minio, bucket: str, key: str):
     try:
         resp = client.get_object(bucket, key)
@@ -63,6 +73,16 @@ def get_json_from_minio(client: Minio, bucket: str, key: str):
         return None
 
 
+def get_object_etag(key: str) -> str | None:
+    """
+    ETag object di BUCKET (tanpa download), None kalau tidak ada.
+    """
+    try:
+        return get_minio_client().stat_object(BUCKET, key).etag
+    except Exception:
+        return None
+
+
 def get_object_to_tempfile(bucket: str, key: str) -> str:
     """
     Download object dari MinIO ke tempfile, return path-nya.
@@ -90,3 +110,26 @@ def put_jsonl_lines(key: str, lines: Iterable[dict]):
         buf.write((json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8"))
     payload = buf.getvalue()
     put_bytes(key, payload, content_type="application/x-ndjson")
+
+
+def get_jsonl_lines(key: str) -> List[dict]:
+    """
+    Download JSONL (NDJSON) dari BUCKET, return list of dict.
+    """
+    c = get_minio_client()
+    resp = c.get_object(BUCKET, key)
+    try:
+        data = resp.read()
+    finally:
+        resp.close()
+        resp.release_conn()
+    return [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+
+
+def list_keys(prefix: str) -> Iterator[str]:
+    """
+    Iterasi semua object key di BUCKET dengan prefix tertentu (rekursif).
+    """
+    c = get_minio_client()
+    for obj in c.list_objects(BUCKET, prefix=prefix, recursive=True):
+        yield obj.object_name
@@ -0,0 +1,218 @@
+import os
+import statistics
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+
+from rq import Retry, get_current_job
+from rq.command import send_stop_job_command
+from rq.job import Job
+
+from app.services.rq_conn import get_queue, get_redis_connection
+
+EXTRACT_TASK = "app.worker_tasks.extraction_worker_tasks.extract_chunk_pdfplumber_task"
+
+DEFAULT_MS_PER_PAGE = int(os.getenv("EXTRACT_EXPECTED_MS_PER_PAGE", "1500"))
+STRAGGLER_FACTOR = float(os.getenv("STRAGGLER_FACTOR", "4"))
+STRAGGLER_MIN_BUDGET_S = int(os.getenv("STRAGGLER_MIN_BUDGET_S", "120"))
+MONITOR_INTERVAL_S = int(os.getenv("STRAGGLER_MONITOR_INTERVAL_S", "30"))
+MONITOR_MAX_ROUNDS = int(os.getenv("STRAGGLER_MONITOR_MAX_ROUNDS", "240"))  # ~2 jam
+
+RUNTIME_SAMPLES_KEY = "extract:ms_per_page"
+RUNTIME_SAMPLES_MAX = 500
+KEY_TTL_S = 2 * 24 * 3600
+
+
+def _chunk_key(run_id: str, chunk_index: int, suffix: str) -> str:
+    return f"extract:{run_id}:chunk-{chunk_index:04d}:{suffix}"
+
+
+# =============================
+# koordinasi attempt (dipanggil dari worker extraction)
+# =============================
+
+def register_attempt(run_id: str, chunk_index: int) -> str | None:
+    """
+    Catat job yang sedang mengerjakan chunk ini (primary / speculative), return job_id-nya.
+    """
+    job = get_current_job()
+    if job is None:
+        return None
+    conn = get_redis_connection()
+    key = _chunk_key(run_id, chunk_index, "attempts")
+    conn.sadd(key, job.id)
+    conn.expire(key, KEY_TTL_S)
+    return job.id
+
+
+def _latest_run_key(doc_id: str) -> str:
+    return f"extract:{doc_id}:latest-run"
+
+
+def _commit_key(out_jsonl_key: str) -> str:
+    return f"extract:commit:{out_jsonl_key}"
+
+
+# latest-run harus sama dengan run ini; dalam satu run hanya attempt pertama yang menang,
+# lock milik run lama boleh diambil alih oleh run yang lebih baru
+_CLAIM_SCRIPT = """
+local latest = redis.call('GET', KEYS[1])
+if latest and latest ~= ARGV[1] then return 0 end
+local run = redis.call('HGET', KEYS[2], 'run')
+local attempt = redis.call('HGET', KEYS[2], 'attempt')
+if run == ARGV[1] and attempt ~= ARGV[2] then return 0 end
+redis.call('HSET', KEYS[2], 'run', ARGV[1], 'attempt', ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+
+def claim_commit(doc_id: str, run_id: str, out_jsonl_key: str, attempt_id: str | None) -> bool:
+    """
+    Attempt pertama yang selesai memenangkan hak menulis chunk-XXXX.jsonl.
+    Lock di-key per out_jsonl_key (bukan per run), dan attempt dari run yang lebih lama
+    dari run terakhir yang di-plan untuk dokumen ini selalu ditolak, jadi hasil re-extract
+    tidak bisa tertimpa attempt lama yang lambat. Retry dari job yang sama tetap boleh menulis ulang.
+    """
+    conn = get_redis_connection()
+    ok = conn.eval(_CLAIM_SCRIPT, 2, _latest_run_key(doc_id), _commit_key(out_jsonl_key),
+                   run_id, attempt_id or "local", KEY_TTL_S)
+    return bool(ok)
+
+
+def is_committed(run_id: str, out_jsonl_key: str) -> bool:
+    run = get_redis_connection().hget(_commit_key(out_jsonl_key), "run")
+    return run is not None and run.decode() == run_id
+
+
+def is_latest_run(doc_id: str, run_id: str) -> bool:
+    latest = get_redis_connection().get(_latest_run_key(doc_id))
+    return latest is None or latest.decode() == run_id
+
+
+def cancel_other_attempts(run_id: str, chunk_index: int, winner_id: str | None):
+    conn = get_redis_connection()
+    for raw in conn.smembers(_chunk_key(run_id, chunk_index, "attempts")):
+        job_id = raw.decode()
+        if job_id == winner_id:
+            continue
+        try:
+            job = Job.fetch(job_id, connection=conn)
+            if job.get_status() == "started":
+                send_stop_job_command(conn, job_id)
+            elif not job.is_finished:
+                job.cancel()
+        except Exception:
+            pass
+
+
+def record_chunk_runtime(pages: int, duration_ms: int):
+    if pages <= 0:
+        return
+    conn = get_redis_connection()
+    conn.lpush(RUNTIME_SAMPLES_KEY, int(duration_ms / pages))
+    conn.ltrim(RUNTIME_SAMPLES_KEY, 0, RUNTIME_SAMPLES_MAX - 1)
+
+
+def expected_ms_per_page() -> float:
+    samples = get_redis_connection().lrange(RUNTIME_SAMPLES_KEY, 0, -1)
+    if not samples:
+        return DEFAULT_MS_PER_PAGE
+    return statistics.median(int(s) for s in samples)
+
+
+# =============================
+# progres run (untuk pass level dokumen setelah semua chunk selesai)
+# =============================
+
+def init_run(doc_id: str, run_id: str, total_jobs: int):
+    """
+    Daftarkan run baru sebagai run terakhir dokumen; attempt dari run sebelumnya tidak bisa commit lagi.
+    total_jobs = job teks + job OCR; run selesai setelah semuanya mark_chunk_done.
+    """
+    conn = get_redis_connection()
+    conn.set(_latest_run_key(doc_id), run_id, ex=30 * 24 * 3600)
+    conn.set(f"extract:{run_id}:total", total_jobs, ex=KEY_TTL_S)
+
+
+def mark_chunk_done(run_id: str, chunk_index: int, ocr: bool = False) -> bool:
+    """
+    Tandai job chunk selesai (sekali per chunk per jenis job, aman untuk retry/duplikat).
+    Return True hanya untuk job terakhir yang membuat seluruh run selesai.
+    """
+    conn = get_redis_connection()
+    done_key = f"extract:{run_id}:done"
+    if not conn.sadd(done_key, f"ocr-{chunk_index}" if ocr else chunk_index):
+        return False
+    conn.expire(done_key, KEY_TTL_S)
+    total = conn.get(f"extract:{run_id}:total")
+    return total is not None and conn.scard(done_key) == int(total)
+
+
+# =============================
+# monitor (job terjadwal di antrian "monitor")
+# =============================
+
+def schedule_extraction_monitor(doc_id: str, run_id: str, chunks: List[Dict[str, Any]], round_no: int = 0):
+    """
+    chunks: [{"chunk_index": 1, "job_id": "...", "pages": 25, "payload": {...}}]
+    """
+    get_queue("monitor").enqueue_in(
+        timedelta(seconds=MONITOR_INTERVAL_S),
+        monitor_extraction_run,
+        doc_id, run_id, chunks, round_no,
+        job_timeout=60,
+    )
+
+
+def monitor_extraction_run(doc_id: str, run_id: str, chunks: List[Dict[str, Any]], round_no: int = 0) -> dict:
+    """
+    Bandingkan runtime tiap chunk yang sedang jalan dengan ekspektasi (median ms/halaman).
+    Chunk yang jauh melewati budget mendapat satu duplikat spekulatif; attempt yang
+    selesai duluan menang (lihat claim_commit) dan membatalkan attempt lainnya.
+    """
+    conn = get_redis_connection()
+    now = datetime.utcnow()  # rq menyimpan started_at sebagai UTC naive
+    ms_per_page = expected_ms_per_page()
+    pending = 0
+    launched = []
+
+    if not is_latest_run(doc_id, run_id):
+        # sudah ada run yang lebih baru (re-extract); monitor run ini berhenti
+        return {"doc_id": doc_id, "run_id": run_id, "round": round_no, "superseded": True}
+
+    for ch in chunks:
+        idx = ch["chunk_index"]
+        if is_committed(run_id, ch["payload"]["out_jsonl_key"]):
+            continue
+        pending += 1
+        if ch.get("speculative_job_id"):
+            continue
+
+        try:
+            job = Job.fetch(ch["job_id"], connection=conn)
+        except Exception:
+            continue
+        if job.get_status() != "started" or not job.started_at:
+            continue
+
+        elapsed_s = (now - job.started_at).total_seconds()
+        budget_s = max(STRAGGLER_MIN_BUDGET_S, ch["pages"] * ms_per_page / 1000.0 * STRAGGLER_FACTOR)
+        if elapsed_s <= budget_s:
+            continue
+
+        dup = get_queue("extractions").enqueue(
+            EXTRACT_TASK,
+            ch["payload"],
+            job_timeout=20 * 60,
+            retry=Retry(max=3, interval=[10, 30, 60]),
+            at_front=True,
+            description=f"speculative doc:{doc_id} chunk:{idx}",
+        )
+        ch["speculative_job_id"] = dup.id
+        launched.append({"chunk_index": idx, "job_id": dup.id, "elapsed_s": int(elapsed_s),
+                         "budget_s": int(budget_s)})
+
+    if pending and round_no < MONITOR_MAX_ROUNDS:
+        schedule_extraction_monitor(doc_id, run_id, chunks, round_no + 1)
+
+    return {"doc_id": doc_id, "run_id": run_id, "round": round_no, "pending": pending, "speculative": launched}
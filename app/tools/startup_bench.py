@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+import sys
+
+import click
+
+# modul yang di-import saat proses start (worker RQ meng-import modul task saat job pertama)
+PROCESS_TYPES = {
+    "api": ["app.main"],
+    "docs-worker": ["app.worker.worker", "app.worker_tasks.docs_worker_tasks"],
+    "extraction-worker": ["app.worker.worker", "app.worker_tasks.extraction_worker_tasks"],
+    "ocr-worker": ["app.worker.worker", "app.worker_tasks.ocr_worker_tasks"],
+}
+
+# budget default (ms import, MB RSS); override via env STARTUP_BUDGET_<TYPE>_MS / _RSS_MB
+DEFAULT_BUDGETS = {
+    "api": (1500, 120),
+    "docs-worker": (1500, 150),
+    "extraction-worker": (2500, 180),
+    "ocr-worker": (1500, 150),
+}
+
+# PDF engine yang tidak boleh ter-load di proses API
+API_FORBIDDEN_MODULES = ["fitz", "pymupdf", "pdfplumber", "pdfminer"]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_PROBE = """
+import json, resource, sys, time
+mods = json.loads(sys.argv[1])
+t0 = time.perf_counter()
+for m in mods:
+    __import__(m)
+dt_ms = 1000 * (time.perf_counter() - t0)
+print(json.dumps({
+    "import_ms": round(dt_ms, 1),
+    "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "loaded": sorted(sys.modules),
+}))
+"""
+
+
+def _budget(process_type: str):
+    ms, mb = DEFAULT_BUDGETS[process_type]
+    env_key = process_type.upper().replace("-", "_")
+    return (
+        float(os.getenv(f"STARTUP_BUDGET_{env_key}_MS", ms)),
+        float(os.getenv(f"STARTUP_BUDGET_{env_key}_RSS_MB", mb)),
+    )
+
+
+def measure(process_type: str, repeat: int = 3) -> dict:
+    """
+    Import modul proses di interpreter baru (cold start), ambil run tercepat.
+    """
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE, json.dumps(PROCESS_TYPES[process_type])],
+            capture_output=True, text=True, check=True, cwd=REPO_ROOT,
+        )
+        res = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or res["import_ms"] < best["import_ms"]:
+            best = res
+    return best
+
+
+@click.command()
+@click.option("--types", "-t", default=",".join(PROCESS_TYPES), help="Comma separated process types")
+@click.option("--repeat", "-r", default=3, show_default=True, help="Cold starts per process type")
+def main(types: str, repeat: int):
+    names = [t.strip() for t in types.split(",") if t.strip()]
+    failed = False
+
+    print(f"{'process':<20}{'import_ms':>12}{'budget':>10}{'rss_mb':>10}{'budget':>10}  status")
+    for name in names:
+        res = measure(name, repeat=repeat)
+        ms_budget, mb_budget = _budget(name)
+        problems = []
+        if res["import_ms"] > ms_budget:
+            problems.append("import time")
+        if res["rss_mb"] > mb_budget:
+            problems.append("rss")
+        if name == "api":
+            heavy = [m for m in API_FORBIDDEN_MODULES if m in res["loaded"]]
+            if heavy:
+                problems.append("pdf engine loaded: " + ",".join(heavy))
+        failed = failed or bool(problems)
+        status = "FAIL (" + "; ".join(problems) + ")" if problems else "ok"
+        print(f"{name:<20}{res['import_ms']:>12}{ms_budget:>10.0f}{res['rss_mb']:>10}{mb_budget:>10.0f}  {status}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
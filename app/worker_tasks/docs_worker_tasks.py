@@ -4,7 +4,13 @@ import time
 from datetime import datetime
 
 import fitz
+from rq import get_current_job
 
+from app.services.docs_bulk_pipeline import record_batch_chunk, record_batch_planned
+from app.services.docs_split_pipeline import new_split_manifest, enqueue_split_jobs, save_manifest
+from app.services.page_classifier import classify_page
+from app.services.page_preview import PREVIEW_PRERENDER_DPI, render_chunk_previews
+from app.services.rq_conn import get_queue
 from app.services.storage import get_minio_client, BUCKET
 
 
@@ -34,7 +40,29 @@ def split_pdf_chunk(
         start_page: int,
         end_page: int,
         out_key: str,
-        meta_key: str):
+        meta_key: str,
+        batch_id: str | None = None):
+    try:
+        meta = _split_pdf_chunk(original_key, doc_id, chunk_index, start_page, end_page, out_key, meta_key)
+    except Exception:
+        job = get_current_job()
+        if batch_id and (job is None or not job.retries_left):
+            # attempt terakhir gagal -> tetap dihitung supaya batch tidak "processing" selamanya
+            record_batch_chunk(batch_id, doc_id, chunk_index, ok=False)
+        raise
+    if batch_id:
+        record_batch_chunk(batch_id, doc_id, chunk_index, ok=meta["status"] == "done")
+    return meta
+
+
+def _split_pdf_chunk(
+        original_key: str,
+        doc_id: str,
+        chunk_index: int,
+        start_page: int,
+        end_page: int,
+        out_key: str,
+        meta_key: str) -> dict:
     raw = _get_bytes(original_key)
     try:
         src = fitz.open(stream=raw, filetype="pdf")
@@ -48,8 +76,10 @@ def split_pdf_chunk(
     e = max(1, min(end_page, total))
     if s > e: s, e = e, s
     dst = fitz.open()
+    pages = []
     for pno in range(s - 1, e):
         dst.insert_pdf(src, from_page=pno, to_page=pno)
+        pages.append({"page_no": pno + 1, **classify_page(src[pno])})
     buf = dst.write()
     dst.close()
     src.close()
@@ -58,7 +88,55 @@ def split_pdf_chunk(
     meta = {
         "doc_id": doc_id, "chunk_index": chunk_index, "start_page": s, "end_page": e,
         "out_key": out_key, "size_bytes": len(buf), "num_pages": e - s + 1,
+        "pages": pages,
         "status": "done", "updated_at": datetime.utcnow().isoformat() + "Z",
     }
     _put_bytes(meta_key, json.dumps(meta, ensure_ascii=False, indent=2).encode(), "application/json")
+
+    if PREVIEW_PRERENDER_DPI:
+        get_queue("docs").enqueue(
+            prerender_chunk_previews_task, doc_id, out_key, s, PREVIEW_PRERENDER_DPI,
+            job_timeout=10 * 60,
+        )
     return meta
+
+
+def prerender_chunk_previews_task(doc_id: str, chunk_key: str, start_page: int, dpi: int) -> dict:
+    """
+    Batch pre-render thumbnail semua halaman chunk ke storage setelah split selesai.
+    """
+    n = render_chunk_previews(doc_id, _get_bytes(chunk_key), start_page, dpi)
+    return {"doc_id": doc_id, "chunk_key": chunk_key, "dpi": dpi, "pages_rendered": n, "updated_at": _ts()}
+
+
+def plan_bulk_split_task(batch_id: str, docs: list, pages_per_chunk: int) -> dict:
+    """
+    Hitung halaman untuk sekelompok dokumen dari satu batch, tulis manifest tiap dokumen,
+    lalu enqueue split semua chunk-nya dalam satu pipeline Redis.
+    docs: [{"doc_id": "...", "original_key": "...", "filename": "..."}]
+    """
+    manifests = []
+    failed = []
+    for d in docs:
+        try:
+            raw = _get_bytes(d["original_key"])
+            with fitz.open(stream=raw, filetype="pdf") as src:
+                total_pages = src.page_count
+        except Exception as e:
+            failed.append({"doc_id": d["doc_id"], "error": str(e)})
+            save_manifest({
+                "doc_id": d["doc_id"], "batch_id": batch_id,
+                "original": {"key": d["original_key"]},
+                "chunks": [], "status": "error", "error": str(e), "version": "1.0.0",
+            })
+            continue
+        manifests.append(new_split_manifest(
+            d["doc_id"], d["original_key"], len(raw), total_pages, pages_per_chunk, batch_id=batch_id))
+
+    total_jobs = enqueue_split_jobs(manifests)
+    for manifest in manifests:
+        save_manifest(manifest)
+    record_batch_planned(batch_id, manifests, [f["doc_id"] for f in failed])
+
+    return {"batch_id": batch_id, "docs_planned": len(manifests), "docs_failed": failed,
+            "split_jobs": total_jobs, "updated_at": _ts()}
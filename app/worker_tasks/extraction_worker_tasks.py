@@ -1,4 +1,9 @@
+from app.services.boilerplate import enqueue_document_dedupe
 from app.services.pdfplumber_extractor import extract_chunk_pdf_to_jsonl
+from app.services.search_index import queue_chunk_for_index
+from app.services.straggler_monitor import (
+    register_attempt, claim_commit, cancel_other_attempts, record_chunk_runtime, mark_chunk_done,
+)
 
 
 def extract_chunk_pdfplumber_task(payload: dict) -> dict:
@@ -9,13 +14,43 @@ def extract_chunk_pdfplumber_task(payload: dict) -> dict:
       "chunk_index": 1,
       "chunk_pdf_key": "docs/{doc_id}/chunks/chunk-0001.pdf",
       "out_jsonl_key": "docs/{doc_id}/texts/chunk-0001.jsonl",
-      "page_offset": 1
+      "page_offset": 1,
+      "page_classes": ["text", "blank", "image_only", ...],  # opsional
+      "page_count": 25,  # opsional, dipakai kalau page_classes tidak ada
+      "table_settings": {...},  # opsional, default DEFAULT_TABLE_SETTINGS
+      "run_id": "..."  # opsional, untuk eksekusi spekulatif
     }
     """
-    return extract_chunk_pdf_to_jsonl(
+    run_id = payload.get("run_id")
+    chunk_index = payload["chunk_index"]
+    commit_guard = None
+    attempt_id = None
+    if run_id:
+        attempt_id = register_attempt(run_id, chunk_index)
+
+        def commit_guard() -> bool:
+            return claim_commit(payload["doc_id"], run_id, payload["out_jsonl_key"], attempt_id)
+
+    result = extract_chunk_pdf_to_jsonl(
         doc_id=payload["doc_id"],
-        chunk_index=payload["chunk_index"],
+        chunk_index=chunk_index,
         chunk_pdf_key=payload["chunk_pdf_key"],
         out_jsonl_key=payload["out_jsonl_key"],
         page_offset=payload["page_offset"],
+        page_classes=payload.get("page_classes"),
+        page_count=payload.get("page_count"),
+        table_settings=payload.get("table_settings"),
+        commit_guard=commit_guard,
     )
+
+    if result["status"] == "done":
+        queue_chunk_for_index(result["out_jsonl_key"])
+    if run_id and result["status"] == "done":
+        cancel_other_attempts(run_id, chunk_index, attempt_id)
+        if result.get("stages_run") and not result.get("stages_cached"):
+            # hanya run penuh; re-extract sebagian (mis. tables saja) lebih cepat dan menurunkan budget
+            record_chunk_runtime(result["pages_written"] - result["pages_blank"], result["duration_ms"])
+        if mark_chunk_done(run_id, chunk_index):
+            # semua job (teks + OCR) selesai -> pass boilerplate level dokumen
+            enqueue_document_dedupe(payload["doc_id"])
+    return result
@@ -0,0 +1,33 @@
+from app.services.boilerplate import enqueue_document_dedupe
+from app.services.ocr_extractor import extract_chunk_pages_ocr_to_jsonl
+from app.services.search_index import queue_chunk_for_index
+from app.services.straggler_monitor import mark_chunk_done
+
+
+def extract_chunk_ocr_task(payload: dict) -> dict:
+    """
+    payload example:
+    {
+      "doc_id": "...",
+      "chunk_index": 1,
+      "chunk_pdf_key": "docs/{doc_id}/chunks/chunk-0001.pdf",
+      "out_jsonl_key": "docs/{doc_id}/texts/chunk-0001.ocr.jsonl",
+      "page_offset": 1,
+      "page_nos": [3, 4],
+      "run_id": "..."  # opsional, dihitung dalam total job run extraction
+    }
+    """
+    result = extract_chunk_pages_ocr_to_jsonl(
+        doc_id=payload["doc_id"],
+        chunk_index=payload["chunk_index"],
+        chunk_pdf_key=payload["chunk_pdf_key"],
+        out_jsonl_key=payload["out_jsonl_key"],
+        page_offset=payload["page_offset"],
+        page_nos=payload["page_nos"],
+    )
+    queue_chunk_for_index(result["out_jsonl_key"])
+    run_id = payload.get("run_id")
+    if run_id and mark_chunk_done(run_id, payload["chunk_index"], ocr=True):
+        # job OCR terakhir -> pass boilerplate level dokumen
+        enqueue_document_dedupe(payload["doc_id"])
+    return result
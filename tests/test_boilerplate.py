@@ -0,0 +1,63 @@
+from app.services.boilerplate import detect_boilerplate, reconstruct_page_record, strip_boilerplate
+
+
+def _record(page_no: int, lines: list[str]) -> dict:
+    content = "\n".join(lines)
+    return {
+        "doc_id": "doc", "page_no": page_no, "chunk_index": 1,
+        "text_blocks": [{"type": "paragraph", "content": content}],
+        "tables": [],
+        "combined_markdown": content,
+    }
+
+
+def _dedupe(records: list[dict]) -> tuple[list[dict], list[dict]]:
+    lines = detect_boilerplate(records)
+    ids_by_hash = {bp["hash"]: bp["id"] for bp in lines}
+    text_by_id = {bp["id"]: bp["text"] for bp in lines}
+    return lines, [strip_boilerplate(r, ids_by_hash, text_by_id) for r in records]
+
+
+def test_short_pages_keep_body_lines():
+    records = [
+        _record(n, ["ACME Confidential", f"Section {n}", "Answer:", "N/A", f"real content {n}", f"Page {n} of 10"])
+        for n in range(1, 11)
+    ]
+
+    lines, out = _dedupe(records)
+
+    assert sorted(bp["text"] for bp in lines) == ["ACME Confidential", "Page 1 of 10"]
+    for n, r in enumerate(out, start=1):
+        assert r["combined_markdown"] == f"Section {n}\nAnswer:\nN/A\nreal content {n}"
+
+
+def test_strip_then_reconstruct_roundtrip():
+    records = [
+        _record(n, ["ACME Confidential", f"Section {n}", f"real content {n}", f"Page {n} of 10"])
+        for n in range(1, 11)
+    ]
+
+    lines, out = _dedupe(records)
+
+    boilerplate = {"lines": lines}
+    for original, stripped in zip(records, out):
+        restored = reconstruct_page_record(stripped, boilerplate)
+        assert restored["text_blocks"] == original["text_blocks"]
+
+
+def test_body_lines_with_dates_or_numbers_are_not_boilerplate():
+    records = [
+        _record(n, [
+            "ACME Confidential",
+            f"Invoice INV-10{n:02d} issued 2024-01-{n:02d} total USD {n * 100}",
+            f"{2010 + n}",
+            f"Printed on 2024-02-{n:02d}",
+        ])
+        for n in range(1, 11)
+    ]
+
+    lines, out = _dedupe(records)
+
+    assert sorted(bp["text"] for bp in lines) == ["ACME Confidential", "Printed on 2024-02-01"]
+    for n, r in enumerate(out, start=1):
+        assert r["combined_markdown"] == f"Invoice INV-10{n:02d} issued 2024-01-{n:02d} total USD {n * 100}\n{2010 + n}"
@@ -0,0 +1,71 @@
+import fitz
+
+from app.services.page_classifier import PAGE_CLASS_BLANK, PAGE_CLASS_IMAGE_ONLY, PAGE_CLASS_TEXT, classify_page
+
+
+def _reopen(pdf: fitz.Document) -> fitz.Document:
+    return fitz.open(stream=pdf.tobytes(), filetype="pdf")
+
+
+def _page_on_background(pdf: fitz.Document) -> fitz.Page:
+    # gambar satu halaman penuh (hasil scan / background slide)
+    page = pdf.new_page()
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), False)
+    pix.clear_with(220)
+    page.insert_image(page.rect, pixmap=pix)
+    return page
+
+
+def test_page_without_content_stream_is_blank():
+    pdf = fitz.open()
+    pdf.new_page()  # tanpa /Contents
+    src = _reopen(pdf)
+    assert src[0].get_contents() == []
+
+    info = classify_page(src[0])
+
+    assert info["class"] == PAGE_CLASS_BLANK
+    assert info["content_bytes"] == 0
+
+
+def test_text_page():
+    pdf = fitz.open()
+    pdf.new_page().insert_text((72, 72), "Laporan keuangan tahunan perusahaan")
+    info = classify_page(_reopen(pdf)[0])
+
+    assert info["class"] == PAGE_CLASS_TEXT
+    assert info["content_bytes"] > 0
+
+
+def test_scan_with_bates_stamp_goes_to_ocr():
+    pdf = fitz.open()
+    page = _page_on_background(pdf)
+    page.insert_text((72, page.rect.height - 20), "ACME CONFIDENTIAL ACME-000123")
+
+    assert classify_page(_reopen(pdf)[0])["class"] == PAGE_CLASS_IMAGE_ONLY
+
+
+def test_scan_with_multiline_margin_stamp_goes_to_ocr():
+    pdf = fitz.open()
+    page = _page_on_background(pdf)
+    page.insert_text((72, 30), "Produced in litigation\nSubject to protective order")
+    page.insert_text((72, page.rect.height - 20), "ACME-000123")
+
+    assert classify_page(_reopen(pdf)[0])["class"] == PAGE_CLASS_IMAGE_ONLY
+
+
+def test_text_on_full_page_background_keeps_text_layer():
+    pdf = fitz.open()
+    page = _page_on_background(pdf)
+    body = "\n".join([
+        "Quarterly results overview for the board of directors",
+        "Revenue grew twelve percent year over year in the region",
+        "Operating margin improved due to lower logistics costs",
+        "Outlook remains stable for the next two fiscal quarters",
+    ])
+    page.insert_text((72, 300), body)
+
+    info = classify_page(_reopen(pdf)[0])
+
+    assert info["text_chars"] > 200
+    assert info["class"] == PAGE_CLASS_TEXT